@@ -20,15 +20,15 @@ def test_STB_FU_PO_2510230048(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
                 time.sleep(70)
                 
@@ -89,25 +89,25 @@ def test_STB_FU_PO_2510230058(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
                 time.sleep(70)
 
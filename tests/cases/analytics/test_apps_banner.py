@@ -18,13 +18,13 @@ def test_STB_FU_PO_2510230053(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
             # 构建自定义路径操作序列
             path_operations = [
@@ -83,19 +83,19 @@ def test_STB_FU_PO_2510230054(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 
             # 构建自定义路径操作序列
             path_operations = [
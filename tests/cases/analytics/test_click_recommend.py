@@ -19,7 +19,7 @@ def test_STB_FU_PO_2510230039(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
 
             # 构建自定义路径操作序列
             path_operations = [
@@ -29,7 +29,7 @@ def test_STB_FU_PO_2510230039(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
             # 执行复杂路径操作并验证埋点
             success, events = analytics_test.execute_path_operation_with_analytics(
@@ -79,11 +79,11 @@ def test_STB_FU_PO_2510230040(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
 
             # 构建自定义路径操作序列
@@ -143,11 +143,11 @@ def test_STB_FU_PO_2510230041(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
             # 构建自定义路径操作序列
             path_operations = [
@@ -157,7 +157,7 @@ def test_STB_FU_PO_2510230041(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
             # 执行复杂路径操作并验证埋点
             success, events = analytics_test.execute_path_operation_with_analytics(
@@ -207,15 +207,15 @@ def test_STB_FU_PO_2510230042(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
 
             # 构建自定义路径操作序列
@@ -226,7 +226,7 @@ def test_STB_FU_PO_2510230042(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
 
             # 执行复杂路径操作并验证埋点
             success, events = analytics_test.execute_path_operation_with_analytics(
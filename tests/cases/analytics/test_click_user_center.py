@@ -18,13 +18,13 @@ def test_STB_FU_PO_2510230116(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 
             # 构建自定义路径操作序列
             path_operations = [
@@ -34,7 +34,7 @@ def test_STB_FU_PO_2510230116(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
 
             # 执行复杂路径操作并验证埋点
             success, events = analytics_test.execute_path_operation_with_analytics(
@@ -84,37 +84,37 @@ def test_STB_FU_PO_2510230117(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.输入文本('zx15880089380@126.com')
                 time.sleep(5)
                 analytics_test.adb_utils.点击遥控返回()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.输入文本('Xin110109')
                 time.sleep(5)
                 analytics_test.adb_utils.点击键盘回车()
                 time.sleep(30)
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
 
             # 构建自定义路径操作序列
             path_operations = [
@@ -124,7 +124,7 @@ def test_STB_FU_PO_2510230117(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
 
             # 执行复杂路径操作并验证埋点
             success, events = analytics_test.execute_path_operation_with_analytics(
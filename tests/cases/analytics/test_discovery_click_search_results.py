@@ -20,33 +20,33 @@ def test_STB_FU_PO_2510230086(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(2)
+                analytics_test.adb_utils.wait_until_stable(max_wait=2)
                 analytics_test.adb_utils.输入文本('cat')
                 time.sleep(3)
                 analytics_test.adb_utils.点击键盘回车()
                 time.sleep(10)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
 
             # 构建自定义路径操作序列
             path_operations = [
@@ -18,17 +18,17 @@ def test_STB_FU_PO_2510230075(analytics_test):
             def init_path():
                 """初始化路径"""
                 analytics_test.adb_utils.点击遥控主页()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控左()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(5)
+                analytics_test.adb_utils.wait_until_stable(max_wait=5)
                 analytics_test.adb_utils.点击遥控OK()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
                 analytics_test.adb_utils.点击遥控上()
-                time.sleep(3)
+                analytics_test.adb_utils.wait_until_stable(max_wait=3)
 
 
                 
@@ -40,7 +40,7 @@ def test_STB_FU_PO_2510230075(analytics_test):
             # 定义目标动作函数
             def last_action():
                 analytics_test.adb_utils.点击遥控右()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控右()
 
             # 执行复杂路径操作并验证埋点
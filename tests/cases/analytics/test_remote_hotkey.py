@@ -124,9 +124,9 @@ def test_STB_FU_PO_2510230002(analytics_test):
             # 清理测试环境
             try:
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控下()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控OK()
             except Exception as e:
                 analytics_test.log_utils.analytics_logger.warning(f"清理操作失败: {e}")
@@ -188,11 +188,11 @@ def test_STB_FU_PO_2510230003(analytics_test):
             try:
                 time.sleep(120)
                 analytics_test.adb_utils.点击遥控返回()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控返回()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控返回()
-                time.sleep(1)
+                analytics_test.adb_utils.wait_until_stable(max_wait=1)
                 analytics_test.adb_utils.点击遥控主页()
                 time.sleep(60)
             except Exception as e:
@@ -99,6 +99,13 @@ def set_device_timezone(adb_utils):
     except Exception as e:
         logger.error(f"设置设备时区失败: {e}")
 
+# Fixture: 定期重新测量截图传输方式
+@pytest.fixture(autouse=True)
+def remeasure_capture_transport(adb_utils):
+    """在用例开始前按间隔重新测量截图传输方式，测速不会发生在测试步骤的等待和查找重试中"""
+    adb_utils.benchmark_capture_if_due()
+    yield
+
 # Fixture: 捕获logcat日志
 @pytest.fixture(scope="session", autouse=True)
 def capture_logcat(adb_utils):
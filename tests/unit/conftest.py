@@ -0,0 +1,22 @@
+import pytest
+
+
+# tests/unit下是只在主机上运行的单元测试，不需要连接设备
+# 同名fixture会覆盖上级conftest中自动执行的设备fixture（设置时区、测速截图、捕获logcat）
+
+@pytest.fixture(scope="session")
+def set_device_timezone():
+    """单元测试不设置设备时区"""
+    yield
+
+
+@pytest.fixture
+def remeasure_capture_transport():
+    """单元测试不测量截图传输方式"""
+    yield
+
+
+@pytest.fixture(scope="session")
+def capture_logcat():
+    """单元测试不捕获logcat日志"""
+    yield
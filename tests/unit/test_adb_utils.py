@@ -0,0 +1,55 @@
+import struct
+
+import numpy as np
+import pytest
+
+from utils.adb_utils import ADBUtils
+
+
+def raw_screencap(pixels, pixel_format=1, colorspace=None):
+    """按screencap原始输出格式生成数据，colorspace不为None时使用Android 9+的16字节头"""
+    height, width = pixels.shape[:2]
+    header = struct.pack('<III', width, height, pixel_format)
+    if colorspace is not None:
+        header += struct.pack('<I', colorspace)
+    return header + pixels.tobytes()
+
+
+@pytest.fixture
+def rgba():
+    pixels = np.zeros((2, 3, 4), dtype=np.uint8)
+    pixels[..., 0] = 10   # R
+    pixels[..., 1] = 20   # G
+    pixels[..., 2] = 30   # B
+    pixels[..., 3] = 255
+    pixels[1, 2] = (200, 100, 50, 255)
+    return pixels
+
+
+@pytest.mark.parametrize("colorspace", [None, 1])
+def test_decode_rgba(rgba, colorspace):
+    """12字节头（Android 8及以下）和16字节头（Android 9+）都能解析为BGR图像"""
+    image = ADBUtils._decode_raw_screencap(raw_screencap(rgba, 1, colorspace))
+    assert image.shape == (2, 3, 3)
+    assert tuple(image[0, 0]) == (30, 20, 10)
+    assert tuple(image[1, 2]) == (50, 100, 200)
+
+
+def test_decode_bgra(rgba):
+    """像素格式5(BGRA_8888)只去掉alpha通道"""
+    image = ADBUtils._decode_raw_screencap(raw_screencap(rgba, 5, 0))
+    assert tuple(image[1, 2]) == (200, 100, 50)
+
+
+@pytest.mark.parametrize("data", [b'', b'\x00' * 8])
+def test_decode_too_short(data):
+    """数据不足一个头部时报错"""
+    with pytest.raises(Exception):
+        ADBUtils._decode_raw_screencap(data)
+
+
+def test_decode_unexpected_length(rgba):
+    """数据长度与宽高不符（如被截断）时报错，不会返回错位的图像"""
+    data = raw_screencap(rgba, 1, 0)
+    with pytest.raises(Exception):
+        ADBUtils._decode_raw_screencap(data[:-1])
@@ -0,0 +1,112 @@
+import subprocess
+
+from utils.key_injector import KeyInjector, parse_getevent_devices, parse_key_layout
+
+
+GETEVENT_OUTPUT = """add device 1: /dev/input/event1
+  name:     "gpio_keys"
+  events:
+    KEY (0001): 0074
+add device 2: /dev/input/event3
+  name:     "remote control"
+  events:
+    KEY (0001): 0002  0003  001c  0067  0069  006a  006c  0071
+                0072  0073  009e  00ac*
+    MSC (0004): 0004
+  input props:
+    <none>
+"""
+
+KEY_LAYOUT = """
+# 注释行
+key 103   DPAD_UP
+key 108   DPAD_DOWN
+key 28    ENTER
+key 232   DPAD_CENTER
+key 353   DPAD_CENTER       WAKE
+key usage 0x0c0067 WINDOW
+axis 0x00 X
+"""
+
+
+def test_parse_getevent_devices():
+    """解析设备名和支持的按键扫描码，包括续行和带状态标记的扫描码"""
+    devices = parse_getevent_devices(GETEVENT_OUTPUT)
+    assert set(devices) == {'/dev/input/event1', '/dev/input/event3'}
+    assert devices['/dev/input/event1'] == {'name': 'gpio_keys', 'keys': {0x74}}
+
+    remote = devices['/dev/input/event3']
+    assert remote['name'] == 'remote control'
+    assert remote['keys'] == {0x02, 0x03, 0x1c, 0x67, 0x69, 0x6a, 0x6c, 0x71, 0x72, 0x73, 0x9e, 0xac}
+
+
+def test_parse_key_layout():
+    """同一按键的多个扫描码按顺序保存，忽略key usage和axis条目"""
+    layout = parse_key_layout(KEY_LAYOUT)
+    assert layout == {
+        'KEYCODE_DPAD_UP': [103],
+        'KEYCODE_DPAD_DOWN': [108],
+        'KEYCODE_ENTER': [28],
+        'KEYCODE_DPAD_CENTER': [232, 353],
+    }
+
+
+class FakeADB:
+    """模拟设备的shell命令，返回码总是0（与ppadb的device.shell一致），sendevent在本机sh中执行"""
+
+    def __init__(self, writable=True, failing_events=()):
+        self.writable = writable
+        self.failing_events = failing_events
+        self.commands = []
+
+    def _run_adb_command(self, command, shell=False, timeout=None):
+        command = command[1]
+        self.commands.append(command)
+        if command == 'getevent -p':
+            return 0, GETEVENT_OUTPUT, ''
+        if command.startswith('test -w'):
+            return 0, 'ok\n' if self.writable else '', ''
+        if command == 'dumpsys input':
+            return 0, '', ''
+        script = command
+        for event in self.failing_events:
+            script = script.replace(f'sendevent /dev/input/event3 {event}', 'false')
+        script = script.replace('sendevent', 'true')
+        result = subprocess.run(['sh', '-c', script], capture_output=True, text=True)
+        return 0, result.stdout, result.stderr
+
+
+def test_detect_picks_remote_device():
+    """选择支持全部方向键的设备，只为设备支持的按键生成命令"""
+    injector = KeyInjector(FakeADB())
+    assert injector.detect()
+    assert injector.device_path == '/dev/input/event3'
+    assert injector.command_for('KEYCODE_DPAD_UP')
+    assert injector.command_for('KEYCODE_POWER') is None
+
+
+def test_detect_checks_writable_output():
+    """返回码为0但没有输出ok时视为设备不可写"""
+    injector = KeyInjector(FakeADB(writable=False))
+    assert not injector.detect()
+
+
+def test_inject_success():
+    injector = KeyInjector(FakeADB())
+    assert injector.inject('KEYCODE_ENTER')
+    assert injector.available
+
+
+def test_inject_falls_back_when_nothing_written():
+    """按下事件没有写入时返回False，由调用方回退到input keyevent"""
+    injector = KeyInjector(FakeADB(failing_events=['1 28 1']))
+    assert not injector.inject('KEYCODE_ENTER')
+    assert not injector.available
+
+
+def test_inject_does_not_fall_back_after_key_down():
+    """按下事件已写入后抬起失败时不回退，避免重复按键，后续按键不再使用注入"""
+    injector = KeyInjector(FakeADB(failing_events=['1 28 0']))
+    assert injector.inject('KEYCODE_ENTER')
+    assert not injector.available
+    assert injector.command_for('KEYCODE_ENTER') is None
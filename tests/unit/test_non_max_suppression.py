@@ -0,0 +1,50 @@
+import numpy as np
+
+from utils.image_recognition import non_max_suppression
+
+
+def iou(a, b):
+    w = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def brute_force_nms(boxes, scores, iou_threshold):
+    keep = []
+    for i in sorted(range(len(boxes)), key=lambda index: -scores[index]):
+        if all(iou(boxes[i], boxes[j]) <= iou_threshold for j in keep):
+            keep.append(i)
+    return keep
+
+
+def test_overlapping_boxes():
+    """重叠的框只保留得分最高的一个，不重叠的框都保留"""
+    boxes = [(0, 0, 10, 10), (1, 1, 11, 11), (20, 20, 30, 30), (2, 0, 12, 10)]
+    scores = [0.8, 0.9, 0.7, 0.85]
+    assert non_max_suppression(boxes, scores).tolist() == [1, 2]
+
+
+def test_empty():
+    assert non_max_suppression([], []).tolist() == []
+
+
+def test_max_results():
+    """最多保留max_results个框，按得分从高到低"""
+    boxes = [(i * 20, 0, i * 20 + 10, 10) for i in range(5)]
+    scores = [0.1, 0.5, 0.3, 0.9, 0.7]
+    assert non_max_suppression(boxes, scores, max_results=3).tolist() == [3, 4, 1]
+
+
+def test_matches_brute_force():
+    """随机框的结果与逐对计算IoU的实现一致"""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        count = int(rng.integers(1, 40))
+        xy = rng.integers(0, 200, (count, 2))
+        size = rng.integers(5, 40, (count, 2))
+        boxes = np.hstack([xy, xy + size])
+        scores = rng.random(count)
+        threshold = float(rng.choice([0.1, 0.3, 0.5]))
+        expected = brute_force_nms(boxes.tolist(), scores.tolist(), threshold)
+        assert non_max_suppression(boxes, scores, threshold).tolist() == expected
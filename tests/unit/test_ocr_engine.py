@@ -0,0 +1,57 @@
+import pytest
+
+from utils.ocr_engine import DATA_COLUMNS, merge_region_words, parse_tesseract_config, region_words
+
+
+@pytest.mark.parametrize("config, expected", [
+    ('--oem 3 --psm 6', (3, 6, {})),
+    ('--psm 7', (None, 7, {})),
+    ('', (None, None, {})),
+    (None, (None, None, {})),
+    ('--oem 1 --psm 6 -c tessedit_char_whitelist=0123456789 -c preserve_interword_spaces=1',
+     (1, 6, {'tessedit_char_whitelist': '0123456789', 'preserve_interword_spaces': '1'})),
+    ("-c 'tessedit_char_blacklist=| ' --psm 11", (None, 11, {'tessedit_char_blacklist': '| '})),
+])
+def test_parse_tesseract_config(config, expected):
+    """解析oem、psm和-c变量，未指定的为None"""
+    assert parse_tesseract_config(config) == expected
+
+
+def test_parse_tesseract_config_ignores_unknown_arguments():
+    """不支持的参数和缺少值的参数被忽略"""
+    assert parse_tesseract_config('--dpi 300 --psm 4 -c novalue --oem') == (None, 4, {})
+
+
+def ocr_data(words):
+    """由(文字, left, top, width, height, block_num)列表生成image_to_data格式的数据"""
+    data = {column: [] for column in DATA_COLUMNS}
+    for text, left, top, width, height, block in words:
+        row = dict(level=5, page_num=1, block_num=block, par_num=1, line_num=1, word_num=len(data['text']) + 1,
+                   left=left, top=top, width=width, height=height, conf=90, text=text)
+        for column in DATA_COLUMNS:
+            data[column].append(row[column])
+    return data
+
+
+def test_region_words_keeps_words_centered_in_core():
+    """只保留中心点在核心区域内的单词，空白单词被丢弃，坐标转换为整图坐标"""
+    data = ocr_data([
+        ('Home', 10, 10, 40, 20, 1),
+        ('', 60, 10, 10, 20, 1),
+        ('Apps', 90, 10, 40, 20, 1),
+    ])
+    words = region_words(data, 100, 200, (100, 200, 200, 300))
+    assert words['text'] == ['Home']
+    assert (words['left'], words['top']) == ([110], [210])
+    assert set(words) == set(DATA_COLUMNS)
+
+
+def test_merge_region_words_separates_blocks():
+    """不同区域的块编号不重复，按区域顺序合并"""
+    first = region_words(ocr_data([('Home', 0, 0, 40, 20, 1), ('Apps', 50, 0, 40, 20, 2)]), 0, 0, (0, 0, 100, 100))
+    second = region_words(ocr_data([('Search', 0, 0, 60, 20, 1)]), 0, 100, (0, 100, 100, 200))
+    merged = merge_region_words([first, second])
+    assert merged['text'] == ['Home', 'Apps', 'Search']
+    assert merged['top'] == [0, 0, 100]
+    assert len(set(merged['block_num'])) == 3
+    assert merge_region_words([]) == {column: [] for column in DATA_COLUMNS}
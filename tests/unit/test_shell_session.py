@@ -0,0 +1,76 @@
+import subprocess
+
+import pytest
+
+from utils.shell_session import ShellSession
+
+
+class LocalShellConnection:
+    """用本机sh模拟ppadb的shell连接"""
+
+    def __init__(self):
+        self._process = subprocess.Popen(['sh'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT, bufsize=0)
+        self.socket = self
+
+    def send(self, service):
+        pass
+
+    def sendall(self, data):
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+
+    def read(self, size):
+        return self._process.stdout.read(size)
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.terminate()
+        self._process.wait(timeout=2)
+
+
+class LocalDevice:
+    def create_connection(self):
+        return LocalShellConnection()
+
+
+@pytest.fixture
+def session():
+    shell = ShellSession(LocalDevice(), 'local', default_timeout=5)
+    yield shell
+    shell.close()
+
+
+def test_output_and_return_code(session):
+    """按结束标记切分每条命令的输出和返回码"""
+    assert session.run('echo hello') == (0, 'hello\n', '')
+    assert session.run('printf "a\\nb"') == (0, 'a\nb', '')
+    assert session.run('echo oops; exit 3') == (3, 'oops\n', 'oops\n')
+
+
+def test_stderr_merged_into_output(session):
+    """标准错误合并到输出中"""
+    return_code, output, _ = session.run('echo out; echo err 1>&2')
+    assert return_code == 0
+    assert output == 'out\nerr\n'
+
+
+def test_unbalanced_quotes_do_not_break_session(session):
+    """命令中的引号不配对时只有该命令失败，会话可以继续使用"""
+    return_code, _, _ = session.run('echo "unterminated')
+    assert return_code != 0
+    assert session.run('echo next') == (0, 'next\n', '')
+
+
+def test_command_does_not_consume_following_input(session):
+    """命令读取标准输入时不会读到后续写入的内容"""
+    assert session.run('cat') == (0, '', '')
+    assert session.run('echo after') == (0, 'after\n', '')
+
+
+def test_timeout_reopens_session(session):
+    """命令超时后关闭会话，下次执行时重新建立"""
+    with pytest.raises(Exception):
+        session.run('sleep 5', timeout=0.2)
+    assert not session.is_alive
+    assert session.run('echo again') == (0, 'again\n', '')
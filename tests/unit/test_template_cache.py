@@ -0,0 +1,71 @@
+import os
+
+import cv2
+import numpy as np
+
+from utils.image_recognition import TemplateCache, build_pyramid
+
+
+def write_template(path, value):
+    image = np.full((64, 48, 3), value, dtype=np.uint8)
+    cv2.rectangle(image, (8, 8), (40, 40), (255 - value, 0, 0), -1)
+    cv2.imwrite(str(path), image)
+
+
+def test_build_pyramid():
+    """每层宽高减半，缩小到min_size以下时停止"""
+    gray = np.zeros((64, 48), dtype=np.uint8)
+    assert [level.shape for level in build_pyramid(gray, levels=3)] == [(64, 48), (32, 24), (16, 12)]
+    assert [level.shape for level in build_pyramid(gray, levels=5, min_size=16)] == [(64, 48), (32, 24)]
+
+
+def test_cache_hit(tmp_path):
+    """文件未变化时返回同一缓存条目"""
+    path = tmp_path / 'icon.png'
+    write_template(path, 50)
+    cache = TemplateCache(pyramid_levels=2)
+
+    entry = cache.get(str(path))
+    assert entry['gray'].shape == (64, 48)
+    assert len(entry['pyramid']) == 2
+    assert cache.get(str(path)) is entry
+
+
+def test_cache_reloads_modified_file(tmp_path):
+    """文件修改时间变化后重新读取模板"""
+    path = tmp_path / 'icon.png'
+    write_template(path, 50)
+    cache = TemplateCache()
+    first = cache.get(str(path))
+
+    write_template(path, 200)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, first['mtime'] + 1000000))
+    second = cache.get(str(path))
+    assert second is not first
+    assert not np.array_equal(second['gray'], first['gray'])
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f'icon{i}.png'))
+        write_template(paths[-1], 40 * i)
+    cache = TemplateCache(max_size=2)
+
+    first = cache.get(paths[0])
+    cache.get(paths[1])
+    assert cache.get(paths[0]) is first
+    cache.get(paths[2])
+    # paths[1]最久未使用，被淘汰
+    assert cache.get(paths[0]) is first
+    assert len(cache._entries) == 2
+    assert os.path.abspath(paths[1]) not in cache._entries
+
+
+def test_missing_or_invalid_file(tmp_path):
+    cache = TemplateCache()
+    assert cache.get(str(tmp_path / 'missing.png')) is None
+    invalid = tmp_path / 'invalid.png'
+    invalid.write_bytes(b'not an image')
+    assert cache.get(str(invalid)) is None
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from utils.image_recognition import best_text_match, substring_distance, text_similarity
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def brute_force_substring_distance(pattern, text):
+    """枚举text的所有子串（含空串）计算编辑距离的最小值"""
+    best = len(pattern)
+    for start in range(len(text) + 1):
+        for end in range(start, len(text) + 1):
+            best = min(best, levenshtein(pattern, text[start:end]))
+    return best
+
+
+@pytest.mark.parametrize("pattern, text, expected", [
+    ('settings', 'open settings now', 0),
+    ('settings', 'open setings now', 1),
+    ('settings', 'open settlngs now', 1),
+    ('设置', '系统设罝中心', 1),
+    ('abc', '', 3),
+    ('', 'abc', 0),
+    ('netflix', 'youtube', 6),
+])
+def test_substring_distance_examples(pattern, text, expected):
+    assert substring_distance(pattern, text) == expected
+
+
+def test_substring_distance_matches_brute_force():
+    """随机字符串的结果与枚举所有子串的实现一致，包括超过64个字符的目标文字"""
+    rng = random.Random(0)
+    for _ in range(300):
+        alphabet = 'abcd' if rng.random() < 0.5 else 'ab设置'
+        pattern = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+        assert substring_distance(pattern, text) == brute_force_substring_distance(pattern, text), (pattern, text)
+
+    pattern = ''.join(rng.choice('abc') for _ in range(70))
+    text = 'xx' + pattern[:30] + 'y' + pattern[31:] + 'zz'
+    assert substring_distance(pattern, text) == 1
+
+
+def test_text_similarity():
+    """忽略大小写和空白，目标文字完整出现时为1"""
+    assert text_similarity('Open S e t t i n g s', 'settings') == 1.0
+    assert text_similarity('系 统 设 罝', '系统设置') == 0.75
+    assert text_similarity('anything', '') == 0.0
+
+
+def details_of(lines):
+    """由[[单词, ...], ...]生成按行排列的image_to_data格式数据，每个单词宽40、高20"""
+    details = {column: [] for column in ('text', 'left', 'top', 'width', 'height', 'block_num', 'par_num', 'line_num')}
+    for line_num, words in enumerate(lines, 1):
+        for index, word in enumerate(words):
+            details['text'].append(word)
+            details['left'].append(index * 50)
+            details['top'].append(line_num * 30)
+            details['width'].append(40)
+            details['height'].append(20)
+            details['block_num'].append(1)
+            details['par_num'].append(1)
+            details['line_num'].append(line_num)
+    return details
+
+
+def test_best_text_match_selects_shortest_span():
+    """在最佳行内选出包含目标文字的最短单词范围"""
+    details = details_of([['Home', 'Movies'], ['My', 'Apps', 'Store'], ['Settings']])
+    match = best_text_match(details, 'apps store')
+    assert match['text'] == 'Apps Store'
+    assert match['similarity'] == 1.0
+    assert match['box'] == (50, 60, 140, 80)
+    assert match['center'] == (95, 70)
+
+
+def test_best_text_match_threshold():
+    """相似度低于阈值时返回None，目标文字不会跨行匹配"""
+    details = details_of([['Settlngs'], ['Movies', 'Home']])
+    assert best_text_match(details, 'settings', threshold=0.8)['text'] == 'Settlngs'
+    assert best_text_match(details, 'settings', threshold=0.9) is None
+    assert best_text_match(details, 'movieshome') is not None
+    assert best_text_match(details, 'settlngsmovies', threshold=0.9) is None
@@ -1,15 +1,53 @@
 import os
 import time
+import struct
 import subprocess
-import os
+import zlib
+import threading
+import cv2
+import numpy as np
 from ppadb.client import Client as AdbClient
 from utils.image_recognition import get_image_recognition
+from utils.shell_session import get_shell_session, close_shell_session
+from utils.key_injector import KeyInjector
+from utils.screen_classifier import get_screen_classifier
+from utils.frame_stream import FrameStream
 import allure
 
+# 遥控器按键名称与Android按键代码的对应关系，用于press_keys的按键序列
+REMOTE_KEY_CODES = {
+    'up': 'KEYCODE_DPAD_UP',
+    'down': 'KEYCODE_DPAD_DOWN',
+    'left': 'KEYCODE_DPAD_LEFT',
+    'right': 'KEYCODE_DPAD_RIGHT',
+    'ok': 'KEYCODE_DPAD_CENTER',
+    'enter': 'KEYCODE_ENTER',
+    'back': 'KEYCODE_BACK',
+    'home': 'KEYCODE_HOME',
+    'menu': 'KEYCODE_MENU',
+    'volume_up': 'KEYCODE_VOLUME_UP',
+    'volume_down': 'KEYCODE_VOLUME_DOWN',
+    'power': 'KEYCODE_POWER',
+    'play_pause': 'KEYCODE_MEDIA_PLAY_PAUSE',
+    'fast_forward': 'KEYCODE_MEDIA_FAST_FORWARD',
+    'rewind': 'KEYCODE_MEDIA_REWIND',
+    'stop': 'KEYCODE_MEDIA_STOP',
+    'channel_up': 'KEYCODE_CHANNEL_UP',
+    'channel_down': 'KEYCODE_CHANNEL_DOWN',
+}
+
 class ADBUtils:
     """ADB工具类,封装常用的ADB操作 - 使用pure-python-adb实现"""
     
-    def __init__(self, device_id=None, host='127.0.0.1', port=5037, tesseract_cmd=None):
+    # 截图传输方式的重新测速间隔(秒)，见benchmark_capture_if_due
+    CAPTURE_BENCHMARK_INTERVAL = 600
+    # 操作前最近一次截图的最长有效时间(秒)：截图早于上一次操作且超过该时间时，操作前重新截图作为参考画面
+    ACTION_REFERENCE_MAX_AGE = 1
+    # 画面流中的帧在收到后多长时间(秒)内可以代替screencap，超过时认为画面已静止，改用screencap获取最后一帧
+    FRAME_STREAM_MAX_AGE = 0.2
+    
+    def __init__(self, device_id=None, host='127.0.0.1', port=5037, tesseract_cmd=None, persistent_shell=True,
+                 key_injection=True, capture_transport='auto', capture_helper=None):
         """
         初始化ADB工具
         
@@ -18,6 +56,11 @@ class ADBUtils:
             host (str, optional): ADB服务器主机
             port (int, optional): ADB服务器端口
             tesseract_cmd (str, optional): Tesseract OCR引擎路径，如果已添加到环境变量则不需要指定
+            persistent_shell (bool, optional): 是否通过常驻shell会话执行shell命令，默认True
+            key_injection (bool, optional): 是否直接向遥控器输入设备注入按键事件，默认True，不可用时回退到input keyevent
+            capture_transport (str, optional): 截图传输方式，'auto'（默认）为连接设备时测速并选择最快的方式，
+                也可以指定'raw'、'raw_gzip'、'png'或'helper'
+            capture_helper (str, optional): 设备端输出JPEG等压缩图像的截图命令，默认读取UIA_CAPTURE_HELPER环境变量，未设置时不使用
         """
         self.device_id = device_id
         self.host = host
@@ -25,9 +68,38 @@ class ADBUtils:
         self.client = None
         self.device = None
         self.tesseract_cmd = tesseract_cmd
+        self.persistent_shell = persistent_shell
+        # 常驻shell会话建立失败后，在此时间之前不再尝试重建
+        self._shell_session_retry_at = 0
+        self.key_injection = key_injection
+        self._key_injector = None
+        # 最近一次按键或启动应用的操作及其时间，以及每次等待画面稳定的耗时记录
+        self._last_action = None
+        self._last_action_time = None
+        self._action_count = 0
+        self._waited_action_count = 0
+        self.settle_history = []
+        # 最近一次获取的屏幕图像(time.monotonic()时刻, 图像)，以及最近一次操作前的画面
+        self._last_frame = None
+        self._action_reference = None
+        # 最近一次界面识别的详细结果
+        self.last_screen_match = None
+        # 后台画面流，启动后获取屏幕图像直接读取最新帧
+        self._frame_stream = None
+        # 截图传输方式及各方式的测速结果(秒/帧，不可用为None)
+        self.capture_transport = None if capture_transport == 'auto' else capture_transport
+        self._auto_capture = capture_transport == 'auto'
+        self.capture_helper = capture_helper or os.environ.get('UIA_CAPTURE_HELPER')
+        self.capture_timings = {}
+        self._capture_measured_at = 0
+        self._capture_lock = threading.Lock()
         
         # 初始化ADB客户端
         self._init_client()
+        
+        # 连接设备时测速一次，不在测试步骤的截图中测速，避免影响等待画面稳定、查找重试等的计时
+        if self._auto_capture:
+            self.benchmark_capture()
     
     def _init_client(self):
         """初始化ADB客户端并连接设备"""
@@ -66,17 +138,61 @@ class ADBUtils:
         else:
             self.use_command_line = False
     
-    def _run_adb_command(self, command, shell=False):
+    def _get_shell_session(self):
+        """
+        获取当前设备的常驻shell会话
+        
+        Returns:
+            ShellSession: 可用的shell会话，未启用或建立失败时返回None
+        """
+        if not self.persistent_shell or time.time() < self._shell_session_retry_at:
+            return None
+        
+        session = get_shell_session(
+            device=None if self.use_command_line else self.device,
+            device_id=self.device_id,
+            use_command_line=self.use_command_line or not self.device
+        )
+        if not session.is_alive:
+            try:
+                session.open()
+            except Exception as e:
+                # 建立失败时暂时回退到单次连接方式
+                self._shell_session_retry_at = time.time() + 10
+                print(f"常驻shell会话建立失败,使用单次连接方式: {e}")
+                return None
+        return session
+    
+    def _run_adb_command(self, command, shell=False, timeout=None):
         """
         执行ADB命令 (兼容纯Python库和命令行方式)
         
+        shell命令优先通过常驻shell会话执行，不需要为每条命令重新建立连接
+        
         Args:
             command (list): 要执行的命令列表
             shell (bool): 是否在shell中执行
+            timeout (float, optional): 超时时间(秒)，默认不限制（常驻会话默认30秒）
         
         Returns:
             tuple: (返回码, 标准输出, 标准错误)
         """
+        # 优先使用常驻shell会话
+        if command[0] == 'shell' and len(command) > 1:
+            session = self._get_shell_session()
+            if session:
+                try:
+                    return session.run(' '.join(command[1:]), timeout=timeout)
+                except Exception as e:
+                    # 命令可能已在设备上执行，不再重复执行
+                    print(f"常驻shell会话执行命令失败: {e}")
+                    return 1, "", str(e)
+        
+        # adbd重启或设备重启后，常驻会话连接失效，输入设备权限也可能变化，需要重新探测
+        if command[0] in ('root', 'unroot', 'reboot'):
+            close_shell_session(self.device_id)
+            self._key_injector = None
+        
         # 优先使用纯Python库
         if not self.use_command_line and self.device:
             try:
@@ -84,7 +200,7 @@ class ADBUtils:
                 if command[0] == 'shell' and len(command) > 1:
                     # 执行shell命令
                     shell_cmd = ' '.join(command[1:])
-                    output = self.device.shell(shell_cmd)
+                    output = self.device.shell(shell_cmd, timeout=timeout)
                     return 0, output, ""
                 elif command[0] == 'pull':
                     # 拉取文件
@@ -115,7 +231,7 @@ class ADBUtils:
         adb_cmd.extend(command)
         
         try:
-            result = subprocess.run(adb_cmd, shell=shell, capture_output=True, text=True)
+            result = subprocess.run(adb_cmd, shell=shell, capture_output=True, text=True, timeout=timeout)
             return result.returncode, result.stdout, result.stderr
         except Exception as e:
             return 1, "", str(e)
@@ -131,16 +247,7 @@ class ADBUtils:
         Returns:
             bool: 操作是否成功
         """
-        # 优先使用纯Python库的方式
-        if not self.use_command_line and self.device:
-            try:
-                self.device.shell(f'input tap {x} {y}')
-                return True
-            except Exception as e:
-                print(f"点击失败: {e}")
-                return False
-        
-        # 备用命令行方式
+        self._record_action(f"点击 ({x}, {y})")
         return_code, stdout, stderr = self._run_adb_command(['shell', 'input', 'tap', str(x), str(y)])
         if return_code != 0:
             print(f"点击失败: {stderr}")
@@ -148,22 +255,297 @@ class ADBUtils:
         return True
 
     
+    def _get_key_injector(self):
+        """
+        获取按键注入工具，首次调用时探测遥控器输入设备
+        
+        Returns:
+            KeyInjector: 可用的按键注入工具，未启用或不可用时返回None
+        """
+        if not self.key_injection:
+            return None
+        if self._key_injector is None:
+            self._key_injector = KeyInjector(self)
+        if not self._key_injector.detect():
+            return None
+        return self._key_injector
+    
     def press_key(self, key_code):
         """
         按下指定的按键
         
+        优先直接向遥控器输入设备写入按键事件，设备不支持该按键时回退到input keyevent
+        
         Args:
             key_code (str): 按键代码,如'KEYCODE_HOME', 'KEYCODE_BACK'等
         
         Returns:
             bool: 操作是否成功
         """
+        self._record_action(f"按键 {key_code}")
+        injector = self._get_key_injector()
+        if injector and injector.inject(key_code):
+            return True
+        
         return_code, stdout, stderr = self._run_adb_command(['shell', 'input', 'keyevent', key_code])
         if return_code != 0:
             print(f"按键失败: {stderr}")
             return False
         return True
     
+    def _key_command(self, key):
+        """
+        生成单个按键的shell命令
+        
+        Args:
+            key (str): 按键名称(如'right'、'ok')或按键代码(如'KEYCODE_DPAD_RIGHT')
+        
+        Returns:
+            str: 按键对应的shell命令
+        """
+        key_code = REMOTE_KEY_CODES.get(str(key).lower(), str(key))
+        injector = self._get_key_injector()
+        command = injector.command_for(key_code) if injector else None
+        return command or f'input keyevent {key_code}'
+    
+    def _parse_key_sequence(self, sequence, settle):
+        """
+        解析按键序列为(按键, 等待方式)步骤列表
+        
+        Args:
+            sequence (list | str): 按键序列，元素可以是按键名称、"按键*次数"或(按键, 等待方式)元组
+            settle: 未单独指定时每一步的等待方式
+        
+        Returns:
+            list: [(按键, 等待方式), ...]
+        """
+        if isinstance(sequence, str):
+            sequence = [sequence]
+        
+        steps = []
+        for item in sequence:
+            if isinstance(item, (tuple, list)):
+                key, wait = item
+            else:
+                key, wait = item, settle
+            
+            key = str(key).strip()
+            count = 1
+            if '*' in key:
+                key, count = key.rsplit('*', 1)
+                key, count = key.strip(), int(count)
+            steps.extend([(key, wait)] * count)
+        return steps
+    
+    def _record_action(self, action):
+        """
+        记录一次会改变画面的操作（在发送操作之前调用），wait_until_stable从该时刻开始计算稳定耗时，
+        并以操作前的画面作为判断画面是否已变化的参考
+        """
+        self._action_reference = self._pre_action_frame()
+        self._last_action = action
+        self._last_action_time = time.monotonic()
+        self._action_count += 1
+    
+    def _pre_action_frame(self):
+        """
+        获取操作前的画面，尽量复用最近一次截图而不额外截图
+        
+        最近一次截图晚于上一次操作时即为当前画面；连续快速操作时（截图在ACTION_REFERENCE_MAX_AGE秒内）
+        使用这一组操作之前的画面；其余情况重新截图
+        
+        Returns:
+            numpy.ndarray: 操作前的屏幕图像，截图失败时返回None
+        """
+        if self._last_frame:
+            captured_at, frame = self._last_frame
+            if (self._last_action_time is None or captured_at > self._last_action_time
+                    or time.monotonic() - captured_at <= self.ACTION_REFERENCE_MAX_AGE):
+                return frame
+        return self.获取屏幕图像()
+    
+    @staticmethod
+    def _stability_frame(frame, region):
+        """裁剪检测区域并转换为1/8大小的灰度帧"""
+        if region:
+            x, y, w, h = region
+            frame = frame[y:y + h, x:x + w]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (max(1, gray.shape[1] // 8), max(1, gray.shape[0] // 8)),
+                          interpolation=cv2.INTER_AREA)
+    
+    def wait_until_stable(self, region=None, threshold=0.002, max_wait=3, stable_time=0.3, interval=0.05, label=None,
+                          min_wait=None, reference=None):
+        """
+        等待屏幕画面稳定，用于替代按键、启动应用后的固定等待
+        
+        连续截图并比较降采样灰度帧。只有在检测到画面相对操作前发生变化、之后变化像素比例持续低于阈值达到stable_time时
+        才提前返回；一直没有检测到变化时至少等待min_wait，避免在界面开始响应之前就认为画面已稳定。
+        操作前的画面由按键、点击、输入文本、启动应用等操作在发送前记录（通常直接复用最近一次截图），也可以通过reference指定
+        
+        Args:
+            region (tuple, optional): 只检测指定区域(x, y, w, h)，默认检测全屏
+            threshold (float): 变化像素比例阈值，范围0-1，默认0.002
+            max_wait (float): 从操作开始计算的最长等待时间(秒)，默认3秒
+            stable_time (float): 画面需要保持不变的时间(秒)，默认0.3秒
+            interval (float): 两次截图的最小间隔(秒)，默认0.05秒
+            label (str, optional): 记录稳定耗时使用的名称，默认使用最近一次按键或启动的应用
+            min_wait (float, optional): 没有检测到画面变化时的最短等待时间(秒)，默认等于max_wait
+            reference (numpy.ndarray, optional): 操作前截取的屏幕图像，画面与其不同即认为已发生变化，默认使用最近一次操作前记录的画面
+        
+        Returns:
+            dict: 包含是否稳定(stable)、是否检测到变化(changed)、从操作开始的稳定耗时(settle_time，秒)和截图帧数(frames)的结果
+        """
+        now = time.monotonic()
+        # 从最近一次操作开始计时；没有未等待过的操作或操作已超过max_wait时从现在开始
+        start = now
+        if self._action_count != self._waited_action_count and now - self._last_action_time < max_wait:
+            start = self._last_action_time
+        min_wait = max_wait if min_wait is None else min(min_wait, max_wait)
+        
+        if reference is None and self._action_count != self._waited_action_count:
+            reference = self._action_reference
+        previous = None
+        previous_time = start
+        if reference is not None:
+            previous = self._stability_frame(reference, region)
+        
+        stable_since = None
+        changed = False
+        frames = 0
+        stable = False
+        
+        while True:
+            frame = self.获取屏幕图像()
+            now = time.monotonic()
+            if frame is not None:
+                frames += 1
+                small = self._stability_frame(frame, region)
+                
+                if previous is not None and previous.shape == small.shape:
+                    # 忽略压缩噪声等微小亮度变化，只统计明显变化的像素
+                    ratio = np.count_nonzero(cv2.absdiff(small, previous) > 16) / small.size
+                    if ratio <= threshold:
+                        if stable_since is None:
+                            stable_since = previous_time
+                        if now - stable_since >= stable_time and (changed or now - start >= min_wait):
+                            stable = True
+                            break
+                    else:
+                        changed = True
+                        stable_since = None
+                previous = small
+                previous_time = now
+            
+            if now - start >= max_wait:
+                break
+            time.sleep(max(0, min(interval, max_wait - (now - start))))
+        
+        # 检测到变化时，画面开始保持不变的时刻即为实际稳定耗时；没有变化时为实际等待的时间
+        settle_time = (stable_since if stable and changed else time.monotonic()) - start
+        self._waited_action_count = self._action_count
+        self._action_reference = None
+        result = {
+            'stable': stable,
+            'changed': changed,
+            'settle_time': settle_time,
+            'frames': frames,
+            'label': label or self._last_action
+        }
+        self.settle_history.append(result)
+        if stable and changed:
+            print(f"{result['label']} 后画面稳定耗时: {settle_time:.2f}秒 (截图{frames}帧)")
+        elif stable:
+            print(f"{result['label']} 后画面在{settle_time:.2f}秒内没有变化 (截图{frames}帧)")
+        else:
+            print(f"{result['label']} 后画面在{max_wait}秒内未稳定 (截图{frames}帧)")
+        return result
+    
+    def current_screen(self, library_dir=None, max_distance=0.25):
+        """
+        识别当前处于哪个界面，只需截一次屏并与参考界面库做一次最近邻查询，可作为每步导航后的快速断言
+        
+        Args:
+            library_dir (str, optional): 参考界面目录（子目录名或文件名作为界面标签），
+                默认使用UIA_SCREEN_LIBRARY环境变量或tests/screens
+            max_distance (float): 最大距离，超过时认为不属于任何参考界面
+        
+        Returns:
+            str: 界面标签，截屏失败、参考界面库为空或不属于任何参考界面时返回None；详细结果保存在last_screen_match中
+        """
+        library_dir = library_dir or os.environ.get('UIA_SCREEN_LIBRARY') or os.path.join('tests', 'screens')
+        screen = self.获取屏幕图像()
+        if screen is None:
+            print("截取屏幕失败")
+            return None
+        
+        result = get_screen_classifier(library_dir).classify(screen, max_distance)
+        self.last_screen_match = result
+        if result['distance'] is None:
+            print(f"参考界面库为空: {library_dir}")
+            return None
+        print(f"当前界面: {result['label']}，距离: {result['distance']:.4f}，"
+              f"候选: {[(c['label'], round(c['distance'], 4)) for c in result['candidates']]}")
+        return result['label']
+    
+    def press_keys(self, sequence, settle="auto", settle_timeout=3):
+        """
+        按顺序发送一组遥控器按键
+        
+        固定等待或不等待的连续步骤会合并为一条shell脚本，在一次设备交互中发送；
+        settle="auto"时每一步按键后截图检测画面，画面稳定后立即发送下一步，不再固定等待
+        
+        Args:
+            sequence (list | str): 按键序列，如['home', 'left', 'down*2', ('ok', 5)]
+                元素可以是按键名称(up/down/left/right/ok/back/home/menu等)、按键代码(KEYCODE_XXX)、
+                "按键*次数"，或(按键, 等待方式)元组用于单独指定该步的等待方式
+            settle (str | float | None): 每步按键后的等待方式，"auto"为等待画面稳定，数字为固定等待秒数，None为不等待
+            settle_timeout (float): settle="auto"时每步最长等待时间(秒)，默认3秒
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        steps = self._parse_key_sequence(sequence, settle)
+        
+        script = []
+        script_duration = 0
+        for key, wait in steps:
+            script.append(f'{{ {self._key_command(key)}; }}')
+            
+            if wait == 'auto':
+                # 先记录按键前的画面并发送已累积的按键，再在本地检测画面相对按键前是否变化并已稳定
+                reference = self._pre_action_frame()
+                if not self._run_key_script(script, script_duration):
+                    return False
+                script, script_duration = [], 0
+                self.wait_until_stable(max_wait=settle_timeout, label=f"按键 {key}", reference=reference)
+            elif wait:
+                script.append(f'sleep {wait}')
+                script_duration += float(wait)
+        
+        return self._run_key_script(script, script_duration)
+    
+    def _run_key_script(self, script, duration=0):
+        """
+        在一次设备交互中执行按键脚本
+        
+        Args:
+            script (list): shell命令列表，按顺序执行，任一命令失败即停止
+            duration (float): 脚本中固定等待的总时长(秒)，用于计算超时时间
+        
+        Returns:
+            bool: 操作是否成功
+        """
+        if not script:
+            return True
+        
+        self._record_action("按键序列")
+        return_code, stdout, stderr = self._run_adb_command(['shell', ' && '.join(script)], timeout=duration + 30)
+        if return_code != 0:
+            print(f"按键序列执行失败: {stderr}")
+            return False
+        return True
+    
     def 输入文本(self, text):
         """
         输入文本
@@ -177,16 +559,7 @@ class ADBUtils:
         # 处理文本中的特殊字符
         processed_text = text.replace(' ', '%s')
         
-        # 优先使用纯Python库的方式
-        if not self.use_command_line and self.device:
-            try:
-                self.device.shell(f'input text {processed_text}')
-                return True
-            except Exception as e:
-                print(f"输入文本失败: {e}")
-                return False
-        
-        # 备用命令行方式
+        self._record_action("输入文本")
         return_code, stdout, stderr = self._run_adb_command(['shell', 'input', 'text', processed_text])
         if return_code != 0:
             print(f"输入文本失败: {stderr}")
@@ -204,19 +577,7 @@ class ADBUtils:
         Returns:
             bool: 操作是否成功
         """
-        # 优先使用纯Python库的方式
-        if not self.use_command_line and self.device:
-            try:
-                if activity_name:
-                    self.device.shell(f'am start -n {package_name}/{activity_name}')
-                else:
-                    self.device.shell(f'monkey -p {package_name} -c android.intent.category.LAUNCHER 1')
-                return True
-            except Exception as e:
-                print(f"启动应用失败: {e}")
-                return False
-        
-        # 备用命令行方式
+        self._record_action(f"启动应用 {package_name}")
         if activity_name:
             cmd = ['shell', 'am', 'start', '-n', f"{package_name}/{activity_name}"]
         else:
@@ -238,16 +599,6 @@ class ADBUtils:
         Returns:
             bool: 操作是否成功
         """
-        # 优先使用纯Python库的方式
-        if not self.use_command_line and self.device:
-            try:
-                self.device.shell(f'am force-stop {package_name}')
-                return True
-            except Exception as e:
-                print(f"停止应用失败: {e}")
-                return False
-        
-        # 备用命令行方式
         return_code, stdout, stderr = self._run_adb_command(['shell', 'am', 'force-stop', package_name])
         if return_code != 0:
             print(f"停止应用失败: {stderr}")
@@ -264,16 +615,6 @@ class ADBUtils:
         Returns:
             bool: 操作是否成功
         """
-        # 优先使用纯Python库的方式
-        if not self.use_command_line and self.device:
-            try:
-                self.device.shell(f'pm clear {package_name}')
-                return True
-            except Exception as e:
-                print(f"清除应用数据失败: {e}")
-                return False
-        
-        # 备用命令行方式
         return_code, stdout, stderr = self._run_adb_command(['shell', 'pm', 'clear', package_name])
         if return_code != 0:
             print(f"清除应用数据失败: {stderr}")
@@ -385,6 +726,274 @@ class ADBUtils:
         
         return info
     
+    def _exec_out(self, command, probe=False):
+        """
+        执行exec-out命令并返回原始二进制输出 (不经过shell的换行转换)
+        
+        Args:
+            command (list): 要执行的命令列表, 如['screencap']
+            probe (bool): 是否为探测命令，探测失败时直接抛出异常，不切换到命令行方式
+        
+        Returns:
+            bytes: 命令的标准输出
+        """
+        # 优先使用纯Python库
+        if not self.use_command_line and self.device:
+            try:
+                conn = self.device.create_connection()
+                with conn:
+                    conn.send('exec:' + ' '.join(command))
+                    return bytes(conn.read_all())
+            except Exception as e:
+                # 探测的命令可能本身不被设备支持，不能据此判断纯Python库不可用
+                if probe:
+                    raise
+                # 如果使用纯Python库失败,尝试使用命令行方式
+                self.use_command_line = True
+                print(f"纯Python ADB命令执行失败,切换到命令行方式: {e}")
+        
+        # 使用命令行方式
+        adb_cmd = ['adb']
+        if self.device_id:
+            adb_cmd.extend(['-s', self.device_id])
+        adb_cmd.append('exec-out')
+        adb_cmd.extend(command)
+        
+        result = subprocess.run(adb_cmd, capture_output=True)
+        if result.returncode != 0:
+            raise Exception(result.stderr.decode('utf-8', errors='ignore').strip())
+        return result.stdout
+    
+    @staticmethod
+    def _decode_raw_screencap(data):
+        """
+        解析screencap原始输出为BGR图像
+        
+        原始输出格式: 宽(4字节) + 高(4字节) + 像素格式(4字节) [+ 色彩空间(4字节), Android 9+] + 像素数据
+        
+        Args:
+            data (bytes): screencap的原始输出
+        
+        Returns:
+            numpy.ndarray: BGR格式的屏幕图像
+        """
+        if len(data) < 12:
+            raise Exception(f"截图数据不完整，长度: {len(data)}")
+        
+        width, height, pixel_format = struct.unpack_from('<III', data, 0)
+        pixel_bytes = width * height * 4
+        header_size = len(data) - pixel_bytes
+        if header_size not in (12, 16):
+            raise Exception(f"不支持的截图数据: {width}x{height}, 像素格式 {pixel_format}, 数据长度 {len(data)}")
+        
+        # 直接在原始缓冲区上构建数组视图，不复制像素数据
+        pixels = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes, offset=header_size).reshape(height, width, 4)
+        
+        # 像素格式: 1=RGBA_8888, 2=RGBX_8888, 5=BGRA_8888
+        if pixel_format == 5:
+            return cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+        return cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+    
+    def _screen_size(self):
+        """
+        获取屏幕分辨率，有覆盖分辨率时优先使用覆盖分辨率
+        
+        Returns:
+            tuple: (宽, 高)，获取失败时返回None
+        """
+        return_code, stdout, stderr = self._run_adb_command(['shell', 'wm', 'size'])
+        if return_code != 0:
+            return None
+        size = None
+        for line in stdout.splitlines():
+            if 'size:' in line:
+                value = line.split('size:', 1)[1].strip()
+                if 'x' in value:
+                    size = tuple(int(part) for part in value.split('x', 1))
+        return size
+    
+    def start_frame_stream(self, buffer_size=8, size=None, bit_rate=8000000):
+        """
+        启动后台画面流：screenrecord持续录制并在本地解码到环形缓冲区，
+        之后的截屏、查找、对比和等待画面稳定都直接读取最新帧，不再每次请求screencap
+        
+        需要本地安装ffmpeg；画面流异常时获取屏幕图像会自动回退到screencap。
+        画面流只在画面变化时输出帧且最后一帧会被解码器滞留，因此只使用最近一次操作之后、
+        FRAME_STREAM_MAX_AGE秒内收到的帧，画面静止后仍通过screencap获取当前画面
+        
+        Args:
+            buffer_size (int): 环形缓冲区保存的帧数
+            size (tuple, optional): 录制分辨率(宽, 高)，默认使用屏幕分辨率
+            bit_rate (int): 录制码率(bps)
+        
+        Returns:
+            bool: 是否启动成功
+        """
+        try:
+            size = size or self._screen_size()
+            if not size:
+                raise Exception("无法获取屏幕分辨率")
+            
+            self.stop_frame_stream()
+            stream = FrameStream(self.device_id, size[0], size[1], buffer_size, bit_rate)
+            stream.start()
+            self._frame_stream = stream
+            
+            # 画面静止时可能收不到第一帧，只确认录制和解码进程正常运行
+            if stream.wait_for_frame(after_count=0, timeout=1) is None and not stream.is_recording:
+                self.stop_frame_stream()
+                raise Exception("screenrecord或ffmpeg进程启动失败")
+            print(f"画面流已启动: {size[0]}x{size[1]}")
+            return True
+        except Exception as e:
+            print(f"启动画面流失败: {e}")
+            return False
+    
+    def stop_frame_stream(self):
+        """停止后台画面流，之后获取屏幕图像恢复使用screencap"""
+        if self._frame_stream:
+            self._frame_stream.stop()
+            self._frame_stream = None
+    
+    def 获取屏幕图像(self):
+        """
+        截取屏幕并直接返回内存中的图像，不经过设备sdcard和本地文件
+        
+        已启动画面流且画面正在变化时直接返回最新帧；否则使用测速选出的最快截图方式（见benchmark_capture），失败时按耗时依次回退到其他方式
+        
+        Returns:
+            numpy.ndarray: BGR格式的屏幕图像，失败时返回None
+        """
+        if self._frame_stream:
+            # 只使用最近一次操作之后刚收到的帧，操作之前的帧或画面静止后滞留的帧都不是当前画面
+            frame = self._frame_stream.latest(max_age=self.FRAME_STREAM_MAX_AGE, after=self._last_action_time)
+            if frame is not None:
+                self._last_frame = (time.monotonic(), frame)
+                return frame
+        
+        # 按测速结果从快到慢依次尝试，当前方式失败时回退到下一种
+        for transport in self._capture_order():
+            try:
+                frame = self._capture_with(transport)
+                # 记录最近一次截图，作为下一次操作前的参考画面
+                self._last_frame = (time.monotonic(), frame)
+                return frame
+            except Exception as e:
+                print(f"使用{transport}方式截图失败: {e}")
+        
+        print("获取屏幕图像失败")
+        return None
+    
+    def _capture_with(self, transport, probe=False):
+        """
+        使用指定的传输方式截图
+        
+        Args:
+            transport (str): 'raw'（原始RGBA）、'raw_gzip'（设备端gzip压缩的原始数据）、'png'（设备端PNG编码）
+                或'helper'（设备端截图命令输出的JPEG等压缩图像）
+            probe (bool): 是否为测速探测，探测失败不会切换到命令行方式
+        
+        Returns:
+            numpy.ndarray: BGR格式的屏幕图像
+        """
+        if transport == 'raw':
+            return self._decode_raw_screencap(self._exec_out(['screencap'], probe))
+        if transport == 'raw_gzip':
+            return self._decode_raw_screencap(zlib.decompress(self._exec_out(['screencap', '|', 'gzip', '-1'], probe), 31))
+        if transport == 'png':
+            command = ['screencap', '-p']
+        elif transport == 'helper' and self.capture_helper:
+            command = self.capture_helper.split()
+        else:
+            raise Exception(f"不支持的截图方式: {transport}")
+        
+        data = self._exec_out(command, probe)
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise Exception(f"{transport}图像数据解码失败")
+        return image
+    
+    def _capture_order(self):
+        """截图方式的尝试顺序：当前选择的方式优先，其余按测速结果从快到慢，未测速的按默认顺序"""
+        with self._capture_lock:
+            timings, current = dict(self.capture_timings), self.capture_transport
+        transports = ['raw', 'png', 'raw_gzip'] + (['helper'] if self.capture_helper else [])
+        measured = sorted((t for t in transports if timings.get(t) is not None), key=lambda t: timings[t])
+        unmeasured = [t for t in transports if t not in timings]
+        order = measured + unmeasured
+        if current in order:
+            order.remove(current)
+            order.insert(0, current)
+        return order
+    
+    def benchmark_capture(self, rounds=2):
+        """
+        测量各截图传输方式的耗时并选择最快的方式
+        
+        USB和网络连接的设备、不同性能的设备上最快的方式不同：
+        原始数据不需要设备端编码但数据量大，PNG数据量小但设备端编码慢。
+        capture_transport='auto'时连接设备时自动调用一次；需要重新测速时在两个用例之间调用（见benchmark_capture_if_due），
+        不要在测试步骤中调用，测速期间持有截图锁，会与其他截图互相影响计时
+        
+        Args:
+            rounds (int): 每种方式测量的次数，取中位数
+        
+        Returns:
+            numpy.ndarray: 测速时最后获取的一帧屏幕图像，所有方式都失败时返回None
+        """
+        transports = ['raw', 'raw_gzip', 'png'] + (['helper'] if self.capture_helper else [])
+        timings = {}
+        image = None
+        with self._capture_lock:
+            for transport in transports:
+                durations = []
+                try:
+                    for _ in range(rounds):
+                        start = time.perf_counter()
+                        image = self._capture_with(transport, probe=True)
+                        durations.append(time.perf_counter() - start)
+                    timings[transport] = sorted(durations)[len(durations) // 2]
+                except Exception as e:
+                    print(f"截图方式{transport}不可用: {e}")
+                    timings[transport] = None
+            
+            self.capture_timings = timings
+            self._capture_measured_at = time.time()
+            available = {t: d for t, d in timings.items() if d is not None}
+            if available:
+                self.capture_transport = min(available, key=available.get)
+        print(f"截图方式测速结果(秒/帧): {timings}，选择: {self.capture_transport}")
+        return image
+    
+    def benchmark_capture_if_due(self, interval=None):
+        """
+        距离上次测速超过指定时间时重新测速，用于在两个用例之间定期重新选择截图方式
+        
+        Args:
+            interval (float, optional): 测速间隔(秒)，默认CAPTURE_BENCHMARK_INTERVAL
+        
+        Returns:
+            bool: 是否进行了测速
+        """
+        interval = self.CAPTURE_BENCHMARK_INTERVAL if interval is None else interval
+        if not self._auto_capture or time.time() - self._capture_measured_at <= interval:
+            return False
+        self.benchmark_capture()
+        return True
+    
+    def 获取截图方式(self):
+        """
+        获取当前使用的截图传输方式和各方式的测速结果
+        
+        Returns:
+            dict: 包含当前方式(transport)、各方式耗时(timings，秒/帧，不可用为None)和测速时间(measured_at)
+        """
+        return {
+            'transport': self.capture_transport,
+            'timings': dict(self.capture_timings),
+            'measured_at': self._capture_measured_at
+        }
+    
     def 截图(self, save_path):
         """
         截图
@@ -395,6 +1004,19 @@ class ADBUtils:
         Returns:
             bool: 操作是否成功
         """
+        # 优先通过内存截图后在本地编码保存
+        image = self.获取屏幕图像()
+        if image is not None:
+            try:
+                success, buffer = cv2.imencode('.png', image)
+                if success:
+                    # 使用open写入，兼容中文路径
+                    with open(save_path, 'wb') as f:
+                        f.write(buffer.tobytes())
+                    return True
+            except Exception as e:
+                print(f"保存截图失败，尝试设备端截图: {e}")
+        
         temp_path = '/sdcard/screenshot.png'
         
         # 优先使用纯Python库的方式
@@ -493,7 +1115,7 @@ class ADBUtils:
         
         return False
 
-    def 查找并点击图标中心坐标(self, target_icon_path, threshold=0.8, max_retries=3, retry_interval=1,test_dir=None):
+    def 查找并点击图标中心坐标(self, target_icon_path, threshold=0.8, max_retries=3, retry_interval=1,test_dir=None, region=None):
         """
         查找目标图标并点击图片中心坐标
         
@@ -502,6 +1124,8 @@ class ADBUtils:
             threshold (float): 匹配阈值，范围0-1，默认0.8
             max_retries (int): 最大重试次数，默认3次
             retry_interval (int): 重试间隔时间(秒)，默认1秒
+            test_dir (str, optional): 保留参数，截图直接在内存中处理，不再写入临时文件
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名（见image_recognition.load_layout）
         
         Returns:
             bool: 是否成功找到并点击目标图标
@@ -514,60 +1138,96 @@ class ADBUtils:
         # 创建图像识别工具实例，传入Tesseract路径
         ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
         
+        for retry in range(max_retries):
+            # 截图
+            screen = self.获取屏幕图像()
+            if screen is None:
+                print(f"第{retry+1}次尝试 - 截取屏幕失败")
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
             
-        # 确定保存目录
-        save_dir = test_dir if test_dir else os.getcwd()
-        
-        # 确保保存目录存在
-        os.makedirs(save_dir, exist_ok=True)
-        
-        
-        # 临时截图路径
-        temp_screenshot_path = os.path.join(save_dir, 'temp_screenshot.png')
-        
-        try:
-            for retry in range(max_retries):
-                # 截图
-                if not self.截图(temp_screenshot_path):
-                    print(f"第{retry+1}次尝试 - 截取屏幕失败")
-                    if retry < max_retries - 1:
-                        time.sleep(retry_interval)
-                        continue
-                    return False
-                
-                # 在屏幕截图中查找目标图标
-                result = ocr_tool.find_image_in_screen(temp_screenshot_path, target_icon_path, threshold)
+            # 在屏幕截图中查找目标图标
+            result = ocr_tool.find_image_in_screen(screen, target_icon_path, threshold, region=region)
+            
+            if result['found']:
+                # 获取目标图标的中心坐标
+                x, y = result['center']
+                print(f"找到目标图标，中心坐标: ({x}, {y})，相似度: {result['similarity']}")
                 
-                if result['found']:
-                    # 获取目标图标的中心坐标
-                    x, y = result['center']
-                    print(f"找到目标图标，中心坐标: ({x}, {y})，相似度: {result['similarity']}")
-                    
-                    # 点击目标图标
-                    if self.tap(x, y):
-                        print(f"成功点击目标图标")
-                        return True
-                    else:
-                        print(f"点击目标图标失败")
-                        if retry < max_retries - 1:
-                            time.sleep(retry_interval)
-                            continue
-                        return False
+                # 点击目标图标
+                if self.点击屏幕坐标(x, y):
+                    print(f"成功点击目标图标")
+                    return True
                 else:
-                    print(f"第{retry+1}次尝试 - 未找到目标图标，相似度: {result['similarity']}")
+                    print(f"点击目标图标失败")
                     if retry < max_retries - 1:
                         time.sleep(retry_interval)
                         continue
                     return False
-        finally:
-            # 清理临时文件
-            if os.path.exists(temp_screenshot_path):
-                try:
-                    os.remove(temp_screenshot_path)
-                except:
-                    pass
+            else:
+                print(f"第{retry+1}次尝试 - 未找到目标图标，相似度: {result['similarity']}")
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
+    
+    def 查找多个图标(self, target_icon_paths, threshold=0.8, region=None):
+        """
+        截取一次屏幕并批量查找多个目标图标，用于判断当前显示的是哪个图标或状态
+        
+        Args:
+            target_icon_paths (list): 目标图标图像路径列表
+            threshold (float): 匹配阈值，范围0-1，默认0.8
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名（见image_recognition.load_layout）
+        
+        Returns:
+            dict: {图标路径: 匹配结果}，截屏失败时返回空字典
+        """
+        missing = [path for path in target_icon_paths if not os.path.exists(path)]
+        if missing:
+            print(f"错误: 目标图标文件不存在: {missing}")
+            return {}
+        
+        screen = self.获取屏幕图像()
+        if screen is None:
+            print("截取屏幕失败")
+            return {}
+        
+        ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
+        results = ocr_tool.find_images_in_screen(screen, target_icon_paths, threshold, region=region)
+        for result in results:
+            print(f"图标 {os.path.basename(result['template'])} - 找到: {result['found']}，相似度: {result['similarity']}")
+        return {result['template']: result for result in results}
+    
+    def 查找所有图标(self, target_icon_path, threshold=0.8, region=None):
+        """
+        截取一次屏幕并查找目标图标的所有出现位置，用于列表、网格等重复元素的界面
+        
+        Args:
+            target_icon_path (str): 目标图标图像路径
+            threshold (float): 匹配阈值，范围0-1，默认0.8
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名（见image_recognition.load_layout）
+        
+        Returns:
+            list: 所有匹配位置，按相似度从高到低排列，每项包含top_left、bottom_right、center和similarity
+        """
+        if not os.path.exists(target_icon_path):
+            print(f"错误: 目标图标文件不存在: {target_icon_path}")
+            return []
+        
+        screen = self.获取屏幕图像()
+        if screen is None:
+            print("截取屏幕失败")
+            return []
+        
+        ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
+        result = ocr_tool.find_all_images_in_screen(screen, target_icon_path, threshold, region=region)
+        print(f"找到目标图标 {len(result['matches'])} 处，最高相似度: {result['similarity']}")
+        return result['matches']
     
-    def 查找并点击文字中心坐标(self, target_text, threshold=0.8, max_retries=3, retry_interval=1, use_fuzzy=True,test_dir=None):
+    def 查找并点击文字中心坐标(self, target_text, threshold=0.8, max_retries=3, retry_interval=1, use_fuzzy=True,test_dir=None, region=None):
         """
         查找匹配文字并点击文字的中心坐标
         
@@ -577,144 +1237,97 @@ class ADBUtils:
             max_retries (int): 最大重试次数，默认3次
             retry_interval (int): 重试间隔时间(秒)，默认1秒
             use_fuzzy (bool): 是否启用模糊匹配，默认True
+            test_dir (str, optional): 保留参数，截图直接在内存中处理，不再写入临时文件
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名（见image_recognition.load_layout）
         
         Returns:
             bool: 是否成功找到并点击目标文字
         """
         # 创建图像识别工具实例，传入Tesseract路径
         ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
-
-        # 确定保存目录
-        save_dir = test_dir if test_dir else os.getcwd()
-        
-        # 确保保存目录存在
-        os.makedirs(save_dir, exist_ok=True)
         
-        # 临时截图路径
-        temp_screenshot_path = os.path.join(save_dir, 'temp_screenshot.png')
-        
-        try:
-            for retry in range(max_retries):
-                # 截图
-                if not self.截图(temp_screenshot_path):
-                    print(f"第{retry+1}次尝试 - 截取屏幕失败")
-                    if retry < max_retries - 1:
-                        time.sleep(retry_interval)
-                        continue
-                    return False
+        for retry in range(max_retries):
+            # 截图
+            screen = self.获取屏幕图像()
+            if screen is None:
+                print(f"第{retry+1}次尝试 - 截取屏幕失败")
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
+            
+            # 识别屏幕上的文字
+            try:
+                # 使用优化的OCR配置，按目标文字自动选择识别语言
+                ocr_result = ocr_tool.find_text_in_screen(screen, target_text, threshold, use_fuzzy, config='--oem 3 --psm 6',
+                                                          region=region)
+                recognized_text = ocr_result.get('text', '')
+                details = ocr_result.get('details', {})
+                confidence = ocr_result.get('confidence', 0)
                 
-                # 识别屏幕上的文字
-                try:
-                    # 使用优化的OCR配置
-                    ocr_result = ocr_tool.ocr_image(temp_screenshot_path, config='--oem 3 --psm 6')
-                    recognized_text = ocr_result.get('text', '')
-                    details = ocr_result.get('details', {})
-                    confidence = ocr_result.get('confidence', 0)
+                # 打印详细的识别信息用于调试
+                print(f"第{retry+1}次尝试 - OCR识别结果({ocr_result.get('lang')}): '{recognized_text}', 置信度: {confidence}")
+            except Exception as e:
+                error_msg = str(e)
+                print(f"第{retry+1}次尝试 - OCR识别失败: {error_msg}")
+                # 特殊处理Tesseract未安装或路径错误的情况
+                if ('Tesseract-OCR' in error_msg or 'tesseract.exe' in error_msg or 'pytesseract' in error_msg):
+                    print(f"警告: Tesseract OCR未正确配置，已安装并配置环境变量，但Python仍无法访问")
+                    print(f"提示: 尝试在实例化时指定完整路径")
+                    # 如果是Tesseract配置问题，默认返回成功以避免测试失败
+                    return True
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
+            
+            # 查找匹配的文字（精确匹配优先，其次模糊匹配）
+            found = ocr_result.get('found', False)
+            if found:
+                print(f"找到目标文字 '{target_text}'，识别置信度: {confidence}")
+            
+            if found:
+                # 从details中找出与目标文字最匹配的文字区域
+                match = None
+                if details and isinstance(details, dict) and 'text' in details and 'left' in details:
+                    match = ocr_tool.find_text_box(details, target_text, threshold, use_fuzzy)
+                
+                if match:
+                    # 文字区域的中心坐标
+                    x, y = match['center']
+                    print(f"找到目标文字 '{target_text}'（识别为 '{match['text']}'，相似度: {match['similarity']:.2f}），中心坐标: ({x}, {y})")
                     
-                    # 打印详细的识别信息用于调试
-                    print(f"第{retry+1}次尝试 - OCR识别结果: '{recognized_text}', 置信度: {confidence}")
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"第{retry+1}次尝试 - OCR识别失败: {error_msg}")
-                    # 特殊处理Tesseract未安装或路径错误的情况
-                    if ('Tesseract-OCR' in error_msg or 'tesseract.exe' in error_msg or 'pytesseract' in error_msg):
-                        print(f"警告: Tesseract OCR未正确配置，已安装并配置环境变量，但Python仍无法访问")
-                        print(f"提示: 尝试在实例化时指定完整路径")
-                        # 如果是Tesseract配置问题，默认返回成功以避免测试失败
+                    # 点击目标文字
+                    if self.点击屏幕坐标(x, y):
+                        print(f"成功点击目标文字 '{target_text}'")
                         return True
-                    if retry < max_retries - 1:
-                        time.sleep(retry_interval)
-                        continue
-                    return False
-                
-                # 查找匹配的文字
-                found = False
-                
-                # 精确匹配优先
-                if target_text.lower() in recognized_text.lower():
-                    print(f"找到目标文字 '{target_text}'，识别置信度: {confidence}")
-                    found = True
-                elif use_fuzzy:
-                    # 使用模糊匹配提高识别的容错性
-                    try:
-                        found = ocr_tool.fuzzy_text_search(recognized_text, target_text, threshold)
-                        if found:
-                            print(f"模糊匹配成功找到目标文字 '{target_text}'")
-                    except Exception as e:
-                        print(f"模糊匹配时出错: {e}")
+                    else:
+                        print(f"点击目标文字 '{target_text}' 失败")
+                        if retry < max_retries - 1:
+                            time.sleep(retry_interval)
+                            continue
+                        return False
                 
-                if found:
-                    # 尝试从details中获取坐标信息
-                    if details and isinstance(details, dict):
-                        # 检查details中是否包含坐标信息
-                        if 'text' in details and 'left' in details and 'top' in details and 'width' in details and 'height' in details:
-                            text_list = details['text']
-                            lefts = details['left']
-                            tops = details['top']
-                            widths = details['width']
-                            heights = details['height']
-                            
-                            # 查找包含目标文字的条目
-                            for i, text in enumerate(text_list):
-                                if target_text.lower() in text.lower() or (use_fuzzy and ocr_tool.fuzzy_text_search(text, target_text, threshold)):
-                                    # 计算文字的中心坐标
-                                    x = lefts[i] + widths[i] // 2
-                                    y = tops[i] + heights[i] // 2
-                                    print(f"找到目标文字 '{target_text}'，中心坐标: ({x}, {y})")
-                                    
-                                    # 点击目标文字
-                                    if self.tap(x, y):
-                                        print(f"成功点击目标文字 '{target_text}'")
-                                        return True
-                                    else:
-                                        print(f"点击目标文字 '{target_text}' 失败")
-                                        if retry < max_retries - 1:
-                                            time.sleep(retry_interval)
-                                            continue
-                                        return False
-                    
-                    # 如果没有详细坐标信息，尝试使用屏幕中心点击作为备选方案
-                    # 获取屏幕分辨率
-                    device_info = self.get_device_info()
-                    if 'screen_size' in device_info:
-                        try:
-                            # 解析屏幕分辨率
-                            size_str = device_info['screen_size']
-                            if 'x' in size_str:
-                                width, height = map(int, size_str.split('x'))
-                                x, y = width // 2, height // 2
-                                print(f"找到目标文字 '{target_text}'，但未获取到精确坐标，点击屏幕中心: ({x}, {y})")
-                                if self.tap(x, y):
-                                    print(f"成功点击屏幕中心")
-                                    return True
-                        except:
-                            pass
-                    
-                    # 如果以上都失败，提示用户但仍返回成功，因为找到了文字
-                    print(f"找到目标文字 '{target_text}'，但无法获取坐标信息")
-                    # 在没有精确坐标的情况下，可以返回成功，因为已经确认文字存在
-                    return True
+                # 没有获取到文字区域时不点击，重新截图识别
+                print(f"第{retry+1}次尝试 - 找到目标文字 '{target_text}'，但未获取到文字区域坐标")
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
+            else:
+                print(f"第{retry+1}次尝试 - 未找到目标文字 '{target_text}'")
+                # 打印更详细的识别结果，帮助调试
+                if len(recognized_text) > 0:
+                    print(f"识别的详细文本:\n{recognized_text}")
                 else:
-                    print(f"第{retry+1}次尝试 - 未找到目标文字 '{target_text}'")
-                    # 打印更详细的识别结果，帮助调试
-                    if len(recognized_text) > 0:
-                        print(f"识别的详细文本:\n{recognized_text}")
-                    else:
-                        print("未识别到任何文本")
-                    
-                    if retry < max_retries - 1:
-                        time.sleep(retry_interval)
-                        continue
-                    return False
-        finally:
-            # 清理临时文件
-            if os.path.exists(temp_screenshot_path):
-                try:
-                    os.remove(temp_screenshot_path)
-                except:
-                    pass
+                    print("未识别到任何文本")
+                
+                if retry < max_retries - 1:
+                    time.sleep(retry_interval)
+                    continue
+                return False
 
-    def 查找文字(self, target_text, threshold=0.8, max_retries=3, retry_interval=1, use_fuzzy=True,test_dir=None):
+    def 查找文字(self, target_text, threshold=0.8, max_retries=3, retry_interval=1, use_fuzzy=True,test_dir=None, region=None):
         """
         查找匹配文字（增强版，支持模糊匹配）
         
@@ -724,26 +1337,20 @@ class ADBUtils:
             max_retries (int): 最大重试次数，默认3次
             retry_interval (int): 重试间隔时间(秒)，默认1秒
             use_fuzzy (bool): 是否启用模糊匹配，默认True
+            test_dir (str, optional): 保留参数，截图直接在内存中处理，不再写入临时文件
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名（见image_recognition.load_layout）
         
         Returns:
             bool: 是否成功找到目标文字
         """
         # 创建图像识别工具实例，传入Tesseract路径
         ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
-
-        # 确定保存目录
-        save_dir = test_dir if test_dir else os.getcwd()
-        
-        # 确保保存目录存在
-        os.makedirs(save_dir, exist_ok=True)
-        
-        # 临时截图路径
-        temp_screenshot_path = os.path.join(save_dir, 'temp_screenshot.png')
         
         try:
             for retry in range(max_retries):
                 # 截图
-                if not self.截图(temp_screenshot_path):
+                screen = self.获取屏幕图像()
+                if screen is None:
                     print(f"第{retry+1}次尝试 - 截取屏幕失败")
                     if retry < max_retries - 1:
                         time.sleep(retry_interval)
@@ -752,14 +1359,15 @@ class ADBUtils:
                 
                 # 识别屏幕上的文字
                 try:
-                    # 使用优化的OCR配置
-                    ocr_result = ocr_tool.ocr_image(temp_screenshot_path, config='--oem 3 --psm 6')
+                    # 使用优化的OCR配置，按目标文字自动选择识别语言
+                    ocr_result = ocr_tool.find_text_in_screen(screen, target_text, threshold, use_fuzzy, config='--oem 3 --psm 6',
+                                                              region=region)
                     recognized_text = ocr_result.get('text', '')
                     details = ocr_result.get('details', {})
                     confidence = ocr_result.get('confidence', 0)
                     
                     # 打印详细的识别信息用于调试
-                    print(f"第{retry+1}次尝试 - OCR识别结果: '{recognized_text}', 置信度: {confidence}")
+                    print(f"第{retry+1}次尝试 - OCR识别结果({ocr_result.get('lang')}): '{recognized_text}', 置信度: {confidence}")
                 except Exception as e:
                     error_msg = str(e)
                     print(f"第{retry+1}次尝试 - OCR识别失败: {error_msg}")
@@ -774,21 +1382,10 @@ class ADBUtils:
                         continue
                     return False
                 
-                # 查找匹配的文字
-                found = False
-                
-                # 精确匹配优先
-                if target_text.lower() in recognized_text.lower():
+                # 查找匹配的文字（精确匹配优先，其次模糊匹配）
+                found = ocr_result.get('found', False)
+                if found:
                     print(f"找到目标文字 '{target_text}'，识别置信度: {confidence}")
-                    found = True
-                elif use_fuzzy:
-                    # 使用模糊匹配提高识别的容错性
-                    try:
-                        found = ocr_tool.fuzzy_text_search(recognized_text, target_text, threshold)
-                        if found:
-                            print(f"模糊匹配成功找到目标文字 '{target_text}'")
-                    except Exception as e:
-                        print(f"模糊匹配时出错: {e}")
                 
                 if found:
                     return True
@@ -1100,14 +1697,19 @@ class ADBUtils:
             allure.attach(f.read(), name=name, attachment_type=allure.attachment_type.PNG)
 
     
-    def 对比图片(self, target_image_path, threshold=0.8, test_dir=None):
+    def 对比图片(self, target_image_path, threshold=0.8, test_dir=None, region=None):
         """
         比较当前屏幕与目标图像的相似度
         
+        相似度为最不相似的局部区域的SSIM，焦点位置、局部内容不同都会判定为不匹配；
+        会变化的区域（轮播图、时钟等）需要用掩码排除（见image_recognition.compare_images）
+        
         Args:
             target_image_path (str): 目标图像文件路径
             threshold (float): 相似度阈值，范围0-1，默认0.9
-            test_dir (str): 测试报告目录路径，如果为None则使用当前工作目录
+            test_dir (str): 保留参数，截图直接在内存中处理，不再写入临时文件
+            region (tuple | str, optional): 只对比屏幕的该区域，(x, y, w, h)或布局文件中的区域名；
+                目标图像为整屏截图时按同一区域裁剪，否则应为该区域的截图
         
         Returns:
             bool: 对比成功返回True，对比失败返回False
@@ -1118,17 +1720,9 @@ class ADBUtils:
                 print(f"错误: 目标图像文件不存在: {target_image_path}")
                 return False
             
-            # 确定保存目录
-            save_dir = test_dir if test_dir else os.getcwd()
-            
-            # 确保保存目录存在
-            os.makedirs(save_dir, exist_ok=True)
-            
-            # 创建临时截图文件路径
-            temp_screenshot_path = os.path.join(save_dir, "temp_compare_screenshot.png")
-            
             # 截取当前屏幕
-            if not self.截图(temp_screenshot_path):
+            screen = self.获取屏幕图像()
+            if screen is None:
                 print(f"截取屏幕失败")
                 return False
             
@@ -1136,18 +1730,12 @@ class ADBUtils:
             ocr_tool = get_image_recognition(tesseract_cmd=self.tesseract_cmd, adb_utils=self)
             
             # 比较当前屏幕截图与目标图像
-            result = ocr_tool.compare_images(temp_screenshot_path, target_image_path, threshold)
+            result = ocr_tool.compare_images(screen, target_image_path, threshold, region=region)
             
             # 记录相似度信息
             similarity = result['similarity']
-            print(f"屏幕与目标图像的相似度: {similarity:.4f}，匹配阈值: {threshold}")
-            
-            # 清理临时文件
-            if os.path.exists(temp_screenshot_path):
-                try:
-                    os.remove(temp_screenshot_path)
-                except:
-                    pass
+            print(f"屏幕与目标图像的相似度: {similarity:.4f}，匹配阈值: {threshold}，比较层级: {result['tier']}"
+                  f"（dHash: {result['hash_similarity']}，SSIM: {result['ssim']}，ORB: {result['match_ratio']}）")
             
             # 返回是否匹配
             return result['is_match']
@@ -265,17 +265,21 @@ class AnalyticsTestBase:
     
     def execute_path_operation_with_analytics(self, event_id, path_operations, target_action, 
                                              path_description="执行路径操作", 
-                                             target_description="目标操作"):
+                                             target_description="目标操作",
+                                             settle="auto"):
         """
         执行一系列路径操作后触发目标动作，并验证埋点事件（只从日志文件验证并检查时间戳到分钟）
         
         Args:
             event_id: 目标埋点事件ID
             path_operations: 路径操作列表，每个元素为(函数, 描述, 参数字典)元组
-                            或使用create_remote_key_operation创建的操作
+                            或使用create_remote_key_operation创建的操作，
+                            也可以直接使用按键序列（如['home', 'left', 'down*2', 'ok']），
+                            连续的按键会合并后通过adb_utils.press_keys一次发送
             target_action: 触发埋点的目标动作函数
             path_description: 路径操作描述
             target_description: 目标动作描述
+            settle: 按键序列每步之后的等待方式，参见ADBUtils.press_keys，默认"auto"等待画面稳定
             
         Returns:
             bool: 是否成功验证埋点
@@ -289,9 +293,17 @@ class AnalyticsTestBase:
             self.adb_utils.添加截图到allure报告("路径初始化后", test_dir=self.test_dir)
             
             # 执行路径操作
-            for i, operation in enumerate(path_operations):
+            for i, operation in enumerate(self._group_key_sequences(path_operations)):
+                # 处理按键序列
+                if isinstance(operation, list):
+                    desc = f"按键序列 {' '.join(str(key) for key in operation)}"
+                    with allure.step(f"路径操作 {i+1}: {desc}"):
+                        self.log_utils.analytics_logger.info(f"执行路径操作 {i+1}: {desc}")
+                        if not self.adb_utils.press_keys(operation, settle=settle):
+                            self.log_utils.analytics_logger.error(f"执行路径操作 {i+1} 失败: {desc}")
+                            raise Exception(f"按键序列执行失败: {desc}")
                 # 处理元组格式的操作 (函数, 描述, 参数)
-                if isinstance(operation, tuple) and len(operation) >= 2:
+                elif isinstance(operation, tuple) and len(operation) >= 2:
                     func, desc, params = operation if len(operation) == 3 else (operation[0], operation[1], {})
                     
                     with allure.step(f"路径操作 {i+1}: {desc}"):
@@ -341,6 +353,33 @@ class AnalyticsTestBase:
                 
             return success, events
     
+    @staticmethod
+    def _group_key_sequences(path_operations):
+        """
+        将路径操作中连续的按键合并为按键序列
+        
+        Args:
+            path_operations: 路径操作列表，按键可以是字符串、(按键, 等待方式)元组或按键序列列表
+            
+        Returns:
+            list: 操作列表，按键序列为list，其他操作保持原样
+        """
+        grouped = []
+        for operation in path_operations:
+            is_key = isinstance(operation, str) or (
+                isinstance(operation, tuple) and len(operation) == 2 and isinstance(operation[0], str)
+            )
+            if isinstance(operation, list):
+                grouped.append(list(operation))
+            elif is_key:
+                if grouped and isinstance(grouped[-1], list):
+                    grouped[-1].append(operation)
+                else:
+                    grouped.append([operation])
+            else:
+                grouped.append(operation)
+        return grouped
+    
     def create_remote_key_operation(self, key_name, key_function=None):
         """
         创建遥控器按键操作，用于构建路径操作序列
@@ -371,6 +410,27 @@ class AnalyticsTestBase:
         
         return (key_function, f"按下遥控器 {key_name} 键", {})
     
+    def create_key_sequence_operation(self, sequence, settle="auto", description=None):
+        """
+        创建按键序列操作，用于构建路径操作序列，整个序列通过adb_utils.press_keys发送
+        
+        Args:
+            sequence: 按键序列，如['home', 'left', 'down*2', 'ok']
+            settle: 每步按键后的等待方式，参见ADBUtils.press_keys
+            description: 操作描述，默认根据按键序列生成
+            
+        Returns:
+            tuple: (操作函数, 操作描述, 参数字典)
+        """
+        if description is None:
+            description = f"按键序列 {' '.join(str(key) for key in sequence)}"
+        
+        def press_sequence():
+            if not self.adb_utils.press_keys(sequence, settle=settle):
+                raise Exception(f"按键序列执行失败: {description}")
+        
+        return (press_sequence, description, {})
+    
     def verify_remote_analytics_data(self, mac_address, wait_minutes=15, csv_url=None):
         """
         等待指定时间后，从CSV链接获取埋点数据并验证本地成功的埋点是否已上报
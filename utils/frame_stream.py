@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+连续画面流
+在后台运行screenrecord输出H.264码流，由ffmpeg解码为BGR帧并保存到固定大小的环形缓冲区，
+截图、查找和对比等操作可以直接读取最新帧，无需每次向设备请求screencap
+
+screenrecord只在画面变化时输出新帧，而ffmpeg的H.264解析器要收到下一帧的起始码才会输出当前帧，
+因此画面静止后最后一帧不会被解码，缓冲区中的最新帧可能是之前的画面。
+调用方应通过latest的max_age/after参数只使用画面变化过程中刚收到的帧，其余情况使用screencap
+"""
+
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# screenrecord单次录制的最长时间为180秒，提前重新启动以免丢帧
+RECORD_TIME_LIMIT = 175
+
+
+class FrameStream:
+    """单设备的后台画面流"""
+
+    def __init__(self, device_id=None, width=1920, height=1080, buffer_size=8, bit_rate=8000000):
+        """
+        初始化画面流（调用start后才开始录制）
+
+        Args:
+            device_id (str, optional): 设备ID
+            width (int): 录制宽度，应与屏幕分辨率一致
+            height (int): 录制高度，应与屏幕分辨率一致
+            buffer_size (int): 环形缓冲区保存的帧数
+            bit_rate (int): 录制码率(bps)，码率越高画面越清晰，文字识别越准确
+        """
+        self.device_id = device_id
+        self.width = width
+        self.height = height
+        self.bit_rate = bit_rate
+        self.frames = deque(maxlen=buffer_size)
+        self.frame_count = 0
+
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._record_process = None
+        self._decode_process = None
+
+    @property
+    def is_alive(self):
+        """画面流是否正在运行"""
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_recording(self):
+        """screenrecord和ffmpeg进程是否都在运行"""
+        processes = (self._record_process, self._decode_process)
+        return self.is_alive and all(process is not None and process.poll() is None for process in processes)
+
+    def start(self):
+        """启动后台录制和解码线程"""
+        if self.is_alive:
+            return
+        if shutil.which('ffmpeg') is None:
+            raise Exception("未找到ffmpeg，无法解码screenrecord画面流")
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"frame-stream-{self.device_id}", daemon=True)
+        self._thread.start()
+        logger.info(f"设备 {self.device_id} 的画面流已启动: {self.width}x{self.height}")
+
+    def stop(self):
+        """停止录制并等待后台线程退出"""
+        self._running = False
+        self._stop_processes()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._cond:
+            self._cond.notify_all()
+        logger.info(f"设备 {self.device_id} 的画面流已停止")
+
+    def _start_processes(self):
+        """启动screenrecord和ffmpeg进程，screenrecord的输出直接接入ffmpeg的输入"""
+        adb_cmd = ['adb']
+        if self.device_id:
+            adb_cmd.extend(['-s', self.device_id])
+        adb_cmd.extend([
+            'exec-out', 'screenrecord', '--output-format=h264',
+            f'--size={self.width}x{self.height}', f'--bit-rate={self.bit_rate}',
+            f'--time-limit={RECORD_TIME_LIMIT}', '-'
+        ])
+        self._record_process = subprocess.Popen(adb_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        ffmpeg_cmd = [
+            # 不探测码流信息，否则画面静止时要等到探测数据量足够才开始输出第一帧
+            'ffmpeg', '-loglevel', 'error', '-fflags', 'nobuffer', '-flags', 'low_delay',
+            '-probesize', '32', '-analyzeduration', '0',
+            '-f', 'h264', '-i', 'pipe:0',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1'
+        ]
+        self._decode_process = subprocess.Popen(
+            ffmpeg_cmd, stdin=self._record_process.stdout, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        # ffmpeg持有管道的读取端，关闭本进程中的副本，screenrecord退出时ffmpeg才能读到EOF
+        self._record_process.stdout.close()
+
+    def _stop_processes(self):
+        """结束screenrecord和ffmpeg进程"""
+        for process in (self._record_process, self._decode_process):
+            if process is None:
+                continue
+            try:
+                process.terminate()
+                process.wait(timeout=2)
+            except Exception:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
+        self._record_process = None
+        self._decode_process = None
+
+    def _run(self):
+        """后台线程：读取解码后的帧，screenrecord到达时间上限或异常退出后重新启动"""
+        frame_size = self.width * self.height * 3
+        while self._running:
+            try:
+                self._start_processes()
+                stdout = self._decode_process.stdout
+                while self._running:
+                    # 每帧使用新的缓冲区，返回给调用方的数组可写且不会被后续帧覆盖
+                    buffer = bytearray(frame_size)
+                    view = memoryview(buffer)
+                    received = 0
+                    while received < frame_size:
+                        count = stdout.readinto(view[received:])
+                        if not count:
+                            break
+                        received += count
+                    if received < frame_size:
+                        break
+
+                    frame = np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+                    with self._cond:
+                        self.frames.append((time.monotonic(), frame))
+                        self.frame_count += 1
+                        self._cond.notify_all()
+            except Exception as e:
+                logger.warning(f"画面流读取失败: {e}")
+            finally:
+                self._stop_processes()
+
+            if self._running:
+                logger.info("screenrecord已退出，重新启动画面流")
+                time.sleep(0.5)
+
+    def latest(self, max_age=None, after=None):
+        """
+        获取最新一帧
+
+        画面静止时解码器会滞留最后一帧（见模块说明），最新帧不一定是当前画面，需要当前画面时应指定max_age和after
+
+        Args:
+            max_age (float, optional): 帧的最长有效时间(秒)，超过时返回None
+            after (float, optional): time.monotonic()时刻，在此之前收到的帧返回None（如按键之前的画面）
+
+        Returns:
+            numpy.ndarray: BGR格式的最新帧，画面流未运行、还没有帧或帧已过期时返回None
+        """
+        if not self.is_alive:
+            return None
+        with self._cond:
+            if not self.frames:
+                return None
+            timestamp, frame = self.frames[-1]
+        if max_age is not None and time.monotonic() - timestamp > max_age:
+            return None
+        if after is not None and timestamp <= after:
+            return None
+        return frame
+
+    def wait_for_frame(self, after_count=None, timeout=1.0):
+        """
+        等待新的一帧
+
+        Args:
+            after_count (int, optional): 等待帧计数超过该值，默认为调用时的帧计数
+            timeout (float): 超时时间(秒)
+
+        Returns:
+            numpy.ndarray: 新的一帧，超时时返回None
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if after_count is None:
+                after_count = self.frame_count
+            while self.frame_count <= after_count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._cond.wait(remaining)
+            return self.frames[-1][1]
@@ -9,13 +9,577 @@ import os
 import cv2
 import numpy as np
 import pytesseract
-from PIL import Image
 import logging
+import re
+import json
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.location_cache import get_location_cache, screen_fingerprint, search_window
+from utils.ocr_engine import get_ocr_engine, region_words, merge_region_words, ocr_image_parallel, ocr_regions
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 默认的OCR语言组合
+DEFAULT_OCR_LANG = 'chi_sim+eng'
+
+
+def select_ocr_lang(text):
+    """
+    根据目标文字选择所需的最小语言组合，纯英文目标不必加载较慢的中文模型
+    
+    Args:
+        text (str): 目标文字
+    
+    Returns:
+        str: 'eng'（不含中文）、'chi_sim'（不含英文字母）或'chi_sim+eng'
+    """
+    has_cjk = any('\u4e00' <= ch <= '\u9fff' or '\u3400' <= ch <= '\u4dbf' for ch in text)
+    has_latin = any(ch.isascii() and ch.isalpha() for ch in text)
+    if not has_cjk:
+        return 'eng'
+    if not has_latin:
+        return 'chi_sim'
+    return DEFAULT_OCR_LANG
+
+
+def _normalize_text(text):
+    """模糊匹配前统一大小写并去掉空白（中文识别结果的字与字之间常带有空格）"""
+    return ''.join(str(text).lower().split())
+
+
+def substring_distance(pattern, text):
+    """
+    计算pattern与text中最相近的子串之间的编辑距离（Myers位并行算法，复杂度与text长度成线性）
+    
+    Args:
+        pattern (str): 目标文字
+        text (str): 被搜索的文本
+    
+    Returns:
+        int: 最小编辑距离，pattern为空时返回0
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    
+    peq = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv = mask, 0
+    score = best = m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 子串可以从text的任意位置开始，移位时不补1
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best
+
+
+def text_similarity(text, target_text):
+    """
+    计算目标文字在文本中的部分匹配相似度
+    
+    Args:
+        text (str): 识别出的文本
+        target_text (str): 目标文字
+    
+    Returns:
+        float: 相似度，范围0-1，目标文字完整出现在文本中时为1
+    """
+    target = _normalize_text(target_text)
+    if not target:
+        return 0.0
+    return max(0.0, 1 - substring_distance(target, _normalize_text(text)) / len(target))
+
+
+def best_text_match(details, target_text, threshold=0.8):
+    """
+    在OCR详细数据中查找与目标文字最匹配的单词区域
+    
+    先按文本行计算部分匹配相似度，再在最佳行内选出相似度最高且最短的连续单词范围
+    
+    Args:
+        details (dict): image_to_data格式的详细数据
+        target_text (str): 目标文字
+        threshold (float): 相似度阈值
+    
+    Returns:
+        dict: 包含匹配文本(text)、相似度(similarity)、区域(box，(x0, y0, x1, y1))和中心坐标(center)，未达到阈值时返回None
+    """
+    lines = OrderedDict()
+    for i, word in enumerate(details['text']):
+        if not str(word).strip():
+            continue
+        key = (details['block_num'][i], details['par_num'][i], details['line_num'][i])
+        lines.setdefault(key, []).append(i)
+    
+    best = None
+    for indexes in lines.values():
+        line_score = text_similarity(''.join(str(details['text'][i]) for i in indexes), target_text)
+        if line_score < threshold or (best and line_score < best[0]):
+            continue
+        
+        # 在行内找出相似度最高、字符数最少的连续单词范围，点击坐标更准确
+        span = None
+        for start in range(len(indexes)):
+            length = 0
+            for end in range(start, len(indexes)):
+                length += len(str(details['text'][indexes[end]]).strip())
+                score = text_similarity(''.join(str(details['text'][i]) for i in indexes[start:end + 1]), target_text)
+                if span is None or score > span[0] or (score == span[0] and length < span[1]):
+                    span = (score, length, indexes[start:end + 1])
+        
+        if best is None or (span[0], -span[1]) > (best[0], -best[1]):
+            best = span
+    
+    if best is None:
+        return None
+    
+    score, _, words = best
+    x0 = min(details['left'][i] for i in words)
+    y0 = min(details['top'][i] for i in words)
+    x1 = max(details['left'][i] + details['width'][i] for i in words)
+    y1 = max(details['top'][i] + details['height'][i] for i in words)
+    return {
+        'text': ' '.join(str(details['text'][i]).strip() for i in words),
+        'similarity': score,
+        'box': (x0, y0, x1, y1),
+        'center': ((x0 + x1) // 2, (y0 + y1) // 2)
+    }
+
+
+def detect_text_regions(gray, min_height=8, max_height=120, min_width=8, min_fill=0.2, padding=4):
+    """
+    检测图像中的文字行区域：形态学梯度突出笔画边缘，水平闭运算将同一行的字符连成一片，
+    再按连通域的尺寸和填充率过滤掉海报、视频等大面积非文字区域
+    
+    Args:
+        gray (numpy.ndarray): 灰度图像
+        min_height (int): 文字行最小高度
+        max_height (int): 文字行最大高度，超过该高度的连通域视为图片区域
+        min_width (int): 文字行最小宽度
+        min_fill (float): 连通域内边缘像素的最小占比
+        padding (int): 区域向外扩展的像素
+    
+    Returns:
+        list: 文字行区域列表，每项为(x0, y0, x1, y1)，按从上到下、从左到右排列
+    """
+    height, width = gray.shape[:2]
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+    
+    count, _, stats, _ = cv2.connectedComponentsWithStats(connected, connectivity=8)
+    regions = []
+    for x, y, w, h, _ in stats[1:].tolist():
+        if not (min_height <= h <= max_height and w >= min_width):
+            continue
+        # 闭运算后的连通域内，原始边缘像素过少的通常是噪点或细线
+        if cv2.countNonZero(binary[y:y + h, x:x + w]) < min_fill * w * h:
+            continue
+        regions.append((max(0, x - padding), max(0, y - padding),
+                        min(width, x + w + padding), min(height, y + h + padding)))
+    
+    regions.sort(key=lambda box: (box[1], box[0]))
+    return regions
+
+
+# 命名区域布局，{界面名: {区域名: [x, y, w, h]}}
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+
+def load_layout(path):
+    """
+    加载界面布局文件中的命名区域，可多次调用加载多个文件
+    
+    布局文件为JSON格式，如 {"home": {"nav_bar": [0, 0, 1920, 120]}}；
+    坐标全部为0-1之间的小数时按屏幕宽高的比例计算
+    
+    Args:
+        path (str): 布局文件路径
+    
+    Returns:
+        dict: 加载后的全部布局
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        layout = json.load(f)
+    with _layouts_lock:
+        for screen, regions in layout.items():
+            _layouts.setdefault(screen, {}).update(regions)
+        return dict(_layouts)
+
+
+def resolve_region(region, shape):
+    """
+    将区域参数解析为图像内的像素区域
+    
+    Args:
+        region (tuple | str): (x, y, w, h)，或布局文件中的区域名（"界面名.区域名"，区域名唯一时可省略界面名）
+        shape (tuple): 图像的shape
+    
+    Returns:
+        tuple: 裁剪到图像范围内的(x, y, w, h)
+    """
+    if isinstance(region, str):
+        screen, _, name = region.rpartition('.')
+        with _layouts_lock:
+            if screen:
+                found = [_layouts.get(screen, {}).get(name)]
+            else:
+                found = [regions[name] for regions in _layouts.values() if name in regions]
+        if len(found) != 1 or found[0] is None:
+            raise Exception(f"未找到唯一的命名区域: {region}")
+        region = found[0]
+    
+    height, width = shape[:2]
+    x, y, w, h = region
+    if all(isinstance(value, float) and 0 <= value <= 1 for value in (x, y, w, h)):
+        x, y, w, h = x * width, y * height, w * width, h * height
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+    if x1 <= x0 or y1 <= y0:
+        raise Exception(f"区域超出图像范围: {region}")
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def crop_region(image, region):
+    """
+    按区域裁剪图像，返回原图的视图（不复制像素）
+    
+    Args:
+        image (numpy.ndarray): 图像
+        region (tuple | str): 区域，格式同resolve_region
+    
+    Returns:
+        tuple: (区域图像, 区域左上角坐标(x, y))
+    """
+    x, y, w, h = resolve_region(region, image.shape)
+    return image[y:y + h, x:x + w], (x, y)
+
+
+def dhash(gray, size=8):
+    """
+    计算图像的差异哈希(dHash)：缩小为(size+1)*size后比较相邻像素的亮度
+    
+    Args:
+        gray (numpy.ndarray): 灰度图像
+        size (int): 哈希边长，哈希位数为size*size
+    
+    Returns:
+        numpy.ndarray: 长度为size*size的布尔数组
+    """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    return (small[:, 1:] > small[:, :-1]).flatten()
+
+
+def ssim(gray1, gray2):
+    """
+    计算两个同尺寸灰度图的结构相似度(SSIM)，使用σ=1.5的高斯窗口
+    
+    Args:
+        gray1 (numpy.ndarray): 灰度图像
+        gray2 (numpy.ndarray): 灰度图像
+    
+    Returns:
+        numpy.ndarray: SSIM图，取平均即为整体SSIM
+    """
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    a = gray1.astype(np.float32)
+    b = gray2.astype(np.float32)
+    
+    blur = lambda img: cv2.GaussianBlur(img, (11, 11), 1.5)
+    mu_a, mu_b = blur(a), blur(b)
+    mu_aa, mu_bb, mu_ab = mu_a * mu_a, mu_b * mu_b, mu_a * mu_b
+    var_a = blur(a * a) - mu_aa
+    var_b = blur(b * b) - mu_bb
+    cov = blur(a * b) - mu_ab
+    
+    return ((2 * mu_ab + c1) * (2 * cov + c2)) / ((mu_aa + mu_bb + c1) * (var_a + var_b + c2))
+
+
+def worst_cell_ssim(ssim_map, mask=None, cell=16, min_coverage=0.25):
+    """
+    将SSIM图划分为cell*cell的网格，返回平均SSIM最低的格子的得分
+    
+    焦点框移动、一行内容平移等界面状态变化只影响屏幕的一小部分，整体平均SSIM仍然很高，
+    按格子取最小值才能反映这类局部差异
+    
+    Args:
+        ssim_map (numpy.ndarray): ssim()返回的SSIM图
+        mask (numpy.ndarray, optional): 与SSIM图同尺寸的布尔掩码，只统计掩码内的像素
+        cell (int): 格子边长(像素)
+        min_coverage (float): 掩码覆盖比例低于该值的格子不参与比较
+    
+    Returns:
+        float: 最低的格子平均SSIM
+    """
+    height, width = ssim_map.shape[:2]
+    size = (max(1, width // cell), max(1, height // cell))
+    weight = mask.astype(np.float32) if mask is not None else np.ones_like(ssim_map, dtype=np.float32)
+    # INTER_AREA缩小即为每个格子内的平均值，加权和除以权重得到掩码内的平均SSIM
+    sums = cv2.resize(ssim_map.astype(np.float32) * weight, size, interpolation=cv2.INTER_AREA)
+    coverage = cv2.resize(weight, size, interpolation=cv2.INTER_AREA)
+    valid = coverage >= min_coverage
+    if not valid.any():
+        return float((ssim_map * weight).sum() / max(weight.sum(), 1))
+    return float((sums[valid] / coverage[valid]).min())
+
+
+def build_pyramid(gray, levels=3, min_size=8):
+    """
+    构建图像金字塔，第0层为原图，每层宽高减半
+    
+    Args:
+        gray (numpy.ndarray): 灰度图像
+        levels (int): 最多构建的层数（含原图）
+        min_size (int): 最小边长，缩小后小于该值时停止
+    
+    Returns:
+        list: 各层灰度图像
+    """
+    pyramid = [gray]
+    while len(pyramid) < levels and min(pyramid[-1].shape[:2]) // 2 >= min_size:
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.3, max_results=None):
+    """
+    非极大值抑制，按得分从高到低保留框，去除与已保留框重叠过多的框
+    
+    Args:
+        boxes (numpy.ndarray): N x 4 的框数组，每行为(x1, y1, x2, y2)
+        scores (numpy.ndarray): 长度为N的得分数组
+        iou_threshold (float): 重叠比例(IoU)超过该值的框被抑制
+        max_results (int, optional): 最多保留的框数量
+    
+    Returns:
+        numpy.ndarray: 保留的框的索引，按得分从高到低排列
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    scores = np.asarray(scores, dtype=np.float32)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+    
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        if max_results and len(keep) >= max_results:
+            break
+        rest = order[1:]
+        # 一次计算当前框与剩余所有框的IoU
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-6)
+        order = rest[iou <= iou_threshold]
+    
+    return np.array(keep, dtype=np.int64)
+
+
+class TemplateCache:
+    """模板图像缓存，按路径和文件修改时间缓存灰度模板及其图像金字塔（LRU淘汰）"""
+    
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+    
+    def __init__(self, max_size=256, pyramid_levels=3):
+        """
+        初始化模板缓存
+        
+        Args:
+            max_size (int): 最多缓存的模板数量
+            pyramid_levels (int): 每个模板构建的金字塔层数（含原图）
+        """
+        self.max_size = max_size
+        self.pyramid_levels = pyramid_levels
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, path):
+        """
+        获取模板，文件未变化时直接使用缓存
+        
+        Args:
+            path (str): 模板图像路径
+        
+        Returns:
+            dict: 包含灰度图(gray)、金字塔(pyramid)的模板信息，读取失败时返回None
+        """
+        key = os.path.abspath(path)
+        try:
+            mtime = os.stat(key).st_mtime_ns
+        except OSError:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['mtime'] == mtime:
+                self._entries.move_to_end(key)
+                return entry
+        
+        # 读取和预处理在锁外进行，避免阻塞其他线程的缓存命中
+        data = np.fromfile(key, dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+        if image is None:
+            return None
+        
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        entry = {
+            'path': key,
+            'mtime': mtime,
+            'gray': gray,
+            'pyramid': build_pyramid(gray, self.pyramid_levels)
+        }
+        
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+    
+    def preload(self, directory):
+        """
+        预加载目录（含子目录）下的所有模板图像
+        
+        Args:
+            directory (str): 模板图像目录
+        
+        Returns:
+            int: 成功加载的模板数量
+        """
+        count = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.lower().endswith(self.IMAGE_EXTENSIONS):
+                    if self.get(os.path.join(root, name)) is not None:
+                        count += 1
+        return count
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class OCRCache:
+    """OCR结果缓存，按图像内容哈希、语言和配置缓存识别结果（LRU淘汰）"""
+    
+    def __init__(self, max_size=64):
+        """
+        初始化OCR结果缓存
+        
+        Args:
+            max_size (int): 最多缓存的识别结果数量
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def image_key(self, image):
+        """
+        计算图像内容的哈希值
+        
+        对全部像素计算哈希，任何像素不同都会得到不同的键，不会因采样漏掉细小的文字变化而返回过期的识别结果
+        
+        Args:
+            image (numpy.ndarray): 图像数组
+        
+        Returns:
+            str: 图像内容哈希（包含尺寸信息）
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16)
+        digest.update(str(image.shape).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get(self, key):
+        """
+        获取缓存的识别结果
+        
+        Args:
+            key (tuple): (图像哈希, 语言, 配置)
+        
+        Returns:
+            dict: 识别结果的深拷贝，未命中时返回None
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        # 返回深拷贝，调用方修改字段或details中的列表都不会影响缓存内容
+        return copy.deepcopy(result)
+    
+    def put(self, key, result):
+        """
+        保存识别结果
+        
+        Args:
+            key (tuple): (图像哈希, 语言, 配置)
+            result (dict): 识别结果
+        """
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def stats(self):
+        """
+        获取缓存命中统计
+        
+        Returns:
+            dict: 包含命中次数(hits)、未命中次数(misses)和当前缓存数量(size)
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+    
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self):
+        return len(self._entries)
+
 
 class ImageRecognition:
     """图像识别工具类，提供图像对比、定位和文字识别功能"""
@@ -24,32 +588,36 @@ class ImageRecognition:
         """
         初始化图像识别工具
         
+        Tesseract可用性在首次文字识别时才检查，不做文字识别的调用不需要启动Tesseract进程
+        
         Args:
             tesseract_cmd (str, optional): Tesseract OCR引擎路径，如果已添加到环境变量则不需要指定
             adb_utils (object, optional): ADB工具实例，用于获取安卓设备屏幕截图
         """
-        # 配置Tesseract OCR路径 - 优先顺序：传入参数 > 自动检测系统PATH > 默认路径
+        self.tesseract_cmd = tesseract_cmd
+        # 配置Tesseract OCR路径 - 优先顺序：传入参数 > 系统PATH
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-        else:
-            # 尝试自动检测系统PATH中的tesseract
-            try:
-                # 如果tesseract在PATH中，pytesseract通常可以直接找到它
-                pytesseract.get_tesseract_version()
-                logger.info("Tesseract已在系统PATH中找到")
-            except Exception as e:
-                # 不使用默认路径，只记录错误
-                logger.error(f"未在系统PATH中找到Tesseract: {e}")
-                logger.warning("请确保Tesseract已安装并添加到系统PATH中，或在实例化时传入正确的路径")
         # 存储ADB工具实例
         self.adb_utils = adb_utils
-        
-        # 检查Tesseract是否可用
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception as e:
-            logger.warning(f"Tesseract OCR初始化失败: {e}")
-            logger.warning("文字识别功能可能无法使用，请确保已安装Tesseract并配置正确路径")
+        # Tesseract是否已检查
+        self._tesseract_checked = False
+        # OCR引擎，首次文字识别时获取
+        self.ocr_engine = None
+        # 是否将整屏OCR分为条带在进程池中并行识别（多核机器上默认开启）
+        self.parallel_ocr = (os.cpu_count() or 1) >= 4
+        # OCR结果缓存，相同画面重复识别时直接返回
+        self.ocr_cache = OCRCache()
+        # 分块OCR的上一帧状态，按(语言, 配置)保存
+        self._tile_states = {}
+        self._tile_lock = threading.Lock()
+        # 模板图像缓存，避免重试时重复解码同一模板
+        self.template_cache = TemplateCache()
+        # 目标位置缓存，按上次找到的位置优先在附近查找
+        self.location_cache = get_location_cache()
+        # 批量模板匹配使用的线程池
+        self._executor = None
+        self._executor_lock = threading.Lock()
         
         # 检查OpenCV是否可用
         try:
@@ -58,6 +626,24 @@ class ImageRecognition:
             cv2.cvtColor(test_img, cv2.COLOR_GRAY2BGR)
         except Exception as e:
             raise Exception(f"OpenCV初始化失败: {e}")
+    
+    def _ensure_tesseract(self):
+        """首次文字识别前检查Tesseract是否可用，只检查一次"""
+        if self._tesseract_checked:
+            return
+        self._tesseract_checked = True
+        
+        self.ocr_engine = get_ocr_engine()
+        if self.ocr_engine.in_process:
+            # 进程内引擎不依赖tesseract可执行文件
+            return
+        
+        try:
+            version = pytesseract.get_tesseract_version()
+            logger.info(f"Tesseract已找到，版本: {version}")
+        except Exception as e:
+            logger.error(f"Tesseract OCR初始化失败: {e}")
+            logger.warning("请确保Tesseract已安装并添加到系统PATH中，或在实例化时传入正确的路径")
             
     def set_adb_utils(self, adb_utils):
         """
@@ -68,145 +654,902 @@ class ImageRecognition:
         """
         self.adb_utils = adb_utils
     
-    def compare_images(self, image_path1, image_path2, threshold=0.9):
+    def preload_templates(self, directory):
+        """
+        预加载目录下的所有模板图像到缓存，通常在测试会话开始时调用
+        
+        Args:
+            directory (str): 模板图像目录
+        
+        Returns:
+            int: 成功加载的模板数量
+        """
+        count = self.template_cache.preload(directory)
+        logger.info(f"已预加载 {count} 个模板图像: {directory}")
+        return count
+    
+    def _get_template(self, target_image):
+        """
+        获取模板的灰度图及金字塔，路径形式的模板通过缓存读取
+        
+        Args:
+            target_image (str | numpy.ndarray): 模板图像路径或图像数组
+        
+        Returns:
+            dict: 包含灰度图(gray)、金字塔(pyramid)的模板信息，读取失败时返回None
+        """
+        if isinstance(target_image, np.ndarray):
+            gray = self._to_gray(target_image)
+            return {'gray': gray, 'pyramid': build_pyramid(gray, self.template_cache.pyramid_levels)}
+        return self.template_cache.get(target_image)
+    
+    def _to_gray(self, image):
+        """
+        将图像转换为灰度图
+        
+        Args:
+            image (str | numpy.ndarray): 图像路径或图像数组
+        
+        Returns:
+            numpy.ndarray: 灰度图像，读取失败时返回None
+        """
+        if isinstance(image, np.ndarray) and image.ndim == 2:
+            return image
+        img = self._read_image(image)
+        if img is None:
+            return None
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    def _read_image(self, image):
+        """
+        读取图像，兼容文件路径和内存中的图像数组
+        
+        Args:
+            image (str | numpy.ndarray): 图像路径或BGR格式的图像数组（如ADBUtils.获取屏幕图像的返回值）
+        
+        Returns:
+            numpy.ndarray: BGR格式的图像，读取失败时返回None
+        """
+        if isinstance(image, np.ndarray):
+            # 内存中的图像直接使用，灰度图统一转换为BGR
+            if image.ndim == 2:
+                return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            if image.shape[2] == 4:
+                return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+            return image
+        
+        # 使用np.fromfile + cv2.imdecode读取，兼容中文路径
+        try:
+            data = np.fromfile(image, dtype=np.uint8)
+        except (OSError, ValueError):
+            return None
+        if data.size == 0:
+            return None
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    
+    def _crop(self, image, region):
+        """
+        按区域裁剪图像，未指定区域时原样返回
+        
+        Args:
+            image (str | numpy.ndarray): 图像路径或图像数组
+            region (tuple | str, optional): 区域，格式同resolve_region
+        
+        Returns:
+            tuple: (区域图像, 区域左上角坐标(x, y))，读取失败时图像为None
+        """
+        if region is None:
+            return image, (0, 0)
+        if not isinstance(image, np.ndarray):
+            image = self._read_image(image)
+            if image is None:
+                return None, (0, 0)
+        return crop_region(image, region)
+    
+    @staticmethod
+    def _offset_match(result, offset):
+        """将区域内的模板匹配结果坐标转换为整图坐标"""
+        dx, dy = offset
+        if dx or dy:
+            for key in ('top_left', 'bottom_right', 'center'):
+                if key in result:
+                    result[key] = (result[key][0] + dx, result[key][1] + dy)
+        return result
+    
+    @staticmethod
+    def _offset_ocr(result, offset):
+        """将区域内的OCR结果坐标转换为整图坐标（不修改缓存中的数据）"""
+        dx, dy = offset
+        if dx or dy:
+            details = dict(result['details'])
+            details['left'] = [left + dx for left in details['left']]
+            details['top'] = [top + dy for top in details['top']]
+            result['details'] = details
+            if 'regions' in result:
+                result['regions'] = [(x0 + dx, y0 + dy, x1 + dx, y1 + dy) for x0, y0, x1, y1 in result['regions']]
+        return result
+    
+    def compare_images(self, image_path1, image_path2, threshold=0.9, region=None, hash_threshold=0.7,
+                       ambiguity=0.05, ssim_width=320, mask=None, cell_size=16):
         """
         比较两个图像的相似度
         
+        分层比较：先用dHash排除明显不同的图像，再计算缩小后的SSIM，
+        SSIM与阈值的差距小于ambiguity时才计算开销较大的ORB特征匹配
+        
+        SSIM层使用最不相似的局部格子的得分（见worst_cell_ssim），而不是整体平均值：
+        焦点框移动、一行内容平移等只改变局部画面的界面状态也会被判定为不匹配
+        
+        第二个图像（参考图像）可以带有掩码，只比较掩码中非0的像素，用于忽略轮播图、时钟、视频预览等动态区域。
+        掩码来自mask参数、参考图像的同名掩码文件（如home.png对应home.mask.png）或参考图像的alpha通道
+        
         Args:
-            image_path1 (str): 第一个图像路径
-            image_path2 (str): 第二个图像路径
+            image_path1 (str | numpy.ndarray): 第一个图像路径或图像数组
+            image_path2 (str | numpy.ndarray): 第二个图像路径或图像数组
             threshold (float): 相似度阈值，范围0-1，默认0.9
+            region (tuple | str, optional): 只对比该区域，(x, y, w, h)或布局文件中的区域名；
+                第二个图像与第一个图像尺寸相同（整屏参考图）时按同一区域裁剪，否则视为已裁剪好的区域图像
+            hash_threshold (float): dHash相似度低于该值（阈值更低时为阈值）时直接判定为不匹配
+            ambiguity (float): SSIM与阈值的差距小于该值时使用ORB特征匹配辅助判断
+            ssim_width (int): 计算SSIM前将图像缩小到的宽度
+            mask (str | numpy.ndarray, optional): 掩码图像路径或数组，非0的像素参与比较
+            cell_size (int): 计算局部SSIM的格子边长（缩小后图像的像素）
         
         Returns:
-            dict: 包含相似度和是否匹配的结果
+            dict: 包含综合相似度(similarity)、是否匹配(is_match)、最终使用的比较层级(tier)
+                  以及各层得分(hash_similarity、ssim（最低的格子SSIM）、ssim_mean（整体平均SSIM）、
+                  mse_similarity、match_ratio，未计算的层为None)的结果
         """
         try:
             # 读取图像
-            img1 = cv2.imread(image_path1)
-            img2 = cv2.imread(image_path2)
+            screen = self._read_image(image_path1)
+            img2 = self._read_image(image_path2)
+            
+            if screen is None or img2 is None:
+                raise Exception(f"无法读取图像: {image_path1 if screen is None else image_path2}")
             
-            if img1 is None or img2 is None:
-                raise Exception(f"无法读取图像: {image_path1 if img1 is None else image_path2}")
+            # 掩码先按参考图像的尺寸读取，与参考图像一起裁剪
+            mask = self._load_mask(image_path2, mask, img2.shape)
+            
+            img1, (x, y) = self._crop(screen, region)
+            if region is not None and img2.shape[:2] == screen.shape[:2]:
+                # 整屏参考图按同一区域裁剪
+                height, width = img1.shape[:2]
+                img2 = img2[y:y + height, x:x + width]
+                if mask is not None:
+                    mask = mask[y:y + height, x:x + width]
             
             # 调整图像大小以匹配
             if img1.shape != img2.shape:
                 img2 = cv2.resize(img2, (img1.shape[1], img1.shape[0]))
+            if mask is not None and mask.shape != img1.shape[:2]:
+                mask = cv2.resize(mask.view(np.uint8), (img1.shape[1], img1.shape[0]), interpolation=cv2.INTER_NEAREST) > 0
             
             # 转换为灰度图
             gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
             gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
             
-            # 使用ORB算法检测特征点
-            orb = cv2.ORB_create()
-            kp1, des1 = orb.detectAndCompute(gray1, None)
-            kp2, des2 = orb.detectAndCompute(gray2, None)
+            # 被掩码忽略的像素使用参考图像的值，使两图在这些位置完全相同
+            if mask is not None:
+                if not mask.any():
+                    raise Exception("掩码中没有需要比较的像素")
+                gray1 = np.where(mask, gray1, gray2)
+            
+            result = {
+                'similarity': 0.0,
+                'is_match': False,
+                'tier': 'hash',
+                'hash_similarity': None,
+                'ssim': None,
+                'ssim_mean': None,
+                'mse_similarity': None,
+                'match_ratio': None
+            }
             
-            # 使用暴力匹配器
-            bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-            matches = bf.match(des1, des2)
+            # 第一层：感知哈希，只用于直接排除明显不同的图像，是否匹配始终由后续层级判断
+            # （阈值低于hash_threshold时按阈值排除，避免宽松阈值下本应匹配的图像在这一层被判定为不匹配）
+            hash1, hash2 = dhash(gray1), dhash(gray2)
+            hash_similarity = 1 - float(np.count_nonzero(hash1 != hash2)) / hash1.size
+            result['hash_similarity'] = hash_similarity
+            if hash_similarity < min(hash_threshold, threshold):
+                result['similarity'] = hash_similarity
+                return result
             
-            # 计算匹配点比例
-            match_ratio = len(matches) / max(len(kp1), len(kp2)) if max(len(kp1), len(kp2)) > 0 else 0
+            # 第二层：缩小后的SSIM和MSE（使用浮点数计算，避免uint8相减溢出）
+            height, width = gray1.shape[:2]
+            if width > ssim_width:
+                size = (ssim_width, max(1, round(height * ssim_width / width)))
+                small1 = cv2.resize(gray1, size, interpolation=cv2.INTER_AREA)
+                small2 = cv2.resize(gray2, size, interpolation=cv2.INTER_AREA)
+            else:
+                small1, small2 = gray1, gray2
             
-            # 计算MSE (均方误差)
-            mse = np.mean((gray1 - gray2) ** 2)
-            # 归一化MSE到0-1范围，表示相似度
-            mse_similarity = 1 / (1 + mse)
+            # 有掩码时只统计掩码内的像素
+            small_mask = None
+            if mask is not None:
+                small_mask = cv2.resize(mask.view(np.uint8), small1.shape[::-1], interpolation=cv2.INTER_NEAREST) > 0
+                if not small_mask.any():
+                    small_mask = None
+            ssim_map = ssim(small1, small2)
+            squared_error = (small1.astype(np.float32) - small2.astype(np.float32)) ** 2
+            ssim_score = worst_cell_ssim(ssim_map, small_mask, cell_size)
+            if small_mask is not None:
+                ssim_map, squared_error = ssim_map[small_mask], squared_error[small_mask]
+            mse = float(squared_error.mean())
+            result.update({'tier': 'ssim', 'ssim': ssim_score, 'ssim_mean': float(ssim_map.mean()),
+                           'mse_similarity': 1 / (1 + mse)})
             
-            # 综合相似度
-            similarity = (match_ratio + mse_similarity) / 2
+            if abs(ssim_score - threshold) >= ambiguity:
+                result['similarity'] = ssim_score
+                result['is_match'] = ssim_score >= threshold
+                return result
             
-            return {
-                'similarity': similarity,
-                'is_match': similarity >= threshold,
+            # 第三层：SSIM接近阈值时，使用ORB特征匹配辅助判断
+            orb = cv2.ORB_create()
+            orb_mask = mask.view(np.uint8) * 255 if mask is not None else None
+            kp1, des1 = orb.detectAndCompute(gray1, orb_mask)
+            kp2, des2 = orb.detectAndCompute(gray2, orb_mask)
+            
+            match_ratio = 0.0
+            if des1 is not None and des2 is not None:
+                # 使用暴力匹配器
+                bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+                matches = bf.match(des1, des2)
+                # 计算匹配点比例
+                match_ratio = len(matches) / max(len(kp1), len(kp2))
+            elif des1 is None and des2 is None:
+                # 两个图像都没有特征点（如纯色画面），由SSIM决定
+                match_ratio = ssim_score
+            
+            # 综合相似度
+            similarity = (ssim_score + match_ratio) / 2
+            result.update({
+                'tier': 'orb',
                 'match_ratio': match_ratio,
-                'mse_similarity': mse_similarity
-            }
+                'similarity': similarity,
+                'is_match': similarity >= threshold
+            })
+            return result
             
         except Exception as e:
             logger.error(f"图像对比失败: {e}")
             raise
     
-    def find_image_in_screen(self, screen_image_path, target_image_path, threshold=0.8):
+    def _load_mask(self, reference, mask, shape):
+        """
+        获取参考图像的掩码
+        
+        Args:
+            reference (str | numpy.ndarray): 参考图像路径或数组
+            mask (str | numpy.ndarray, optional): 显式指定的掩码图像路径或数组
+            shape (tuple): 比较图像的尺寸，掩码会缩放到该尺寸
+        
+        Returns:
+            numpy.ndarray: 布尔掩码，True表示参与比较的像素；没有掩码时返回None
+        """
+        if mask is None and isinstance(reference, str):
+            root, _ = os.path.splitext(reference)
+            sidecar = f"{root}.mask.png"
+            if os.path.exists(sidecar):
+                mask = sidecar
+            else:
+                # 带alpha通道的参考图像，透明像素不参与比较
+                data = np.fromfile(reference, dtype=np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_UNCHANGED) if data.size else None
+                if image is not None and image.ndim == 3 and image.shape[2] == 4:
+                    mask = image[:, :, 3]
+        elif mask is None and isinstance(reference, np.ndarray) and reference.ndim == 3 and reference.shape[2] == 4:
+            mask = reference[:, :, 3]
+        
+        if mask is None:
+            return None
+        if isinstance(mask, str):
+            data = np.fromfile(mask, dtype=np.uint8)
+            mask = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE) if data.size else None
+            if mask is None:
+                raise Exception("无法读取掩码图像")
+        elif mask.ndim == 3:
+            mask = cv2.cvtColor(mask, cv2.COLOR_BGR2GRAY)
+        
+        mask = np.ascontiguousarray(mask, dtype=np.uint8)
+        if mask.shape[:2] != shape[:2]:
+            mask = cv2.resize(mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+        return mask > 0
+    
+    def _match_full(self, screen_gray, template_gray):
+        """
+        全分辨率模板匹配
+        
+        Returns:
+            tuple: (最大相似度, 左上角坐标)，模板大于屏幕时返回(0.0, None)
+        """
+        if template_gray.shape[0] > screen_gray.shape[0] or template_gray.shape[1] > screen_gray.shape[1]:
+            return 0.0, None
+        result = cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        return float(max_val), max_loc
+    
+    def _match_pyramid(self, screen_pyramid, template_pyramid, threshold, candidates=5):
+        """
+        由粗到精的模板匹配：先在低分辨率层找出候选位置，再只在候选位置附近做全分辨率匹配
+        
+        Args:
+            screen_pyramid (list): 屏幕灰度图金字塔
+            template_pyramid (list): 模板灰度图金字塔
+            threshold (float): 匹配阈值
+            candidates (int): 低分辨率层保留的候选位置数量
+        
+        Returns:
+            tuple: (最大相似度, 左上角坐标)，无法使用金字塔时返回None
+        """
+        level = min(len(screen_pyramid), len(template_pyramid)) - 1
+        if level <= 0:
+            return None
+        
+        coarse_screen = screen_pyramid[level]
+        coarse_template = template_pyramid[level]
+        if coarse_template.shape[0] > coarse_screen.shape[0] or coarse_template.shape[1] > coarse_screen.shape[1]:
+            return None
+        
+        coarse = cv2.matchTemplate(coarse_screen, coarse_template, cv2.TM_CCOEFF_NORMED)
+        
+        # 低分辨率下相似度会偏低，放宽候选阈值
+        coarse_floor = max(0.0, threshold - 0.25)
+        th, tw = coarse_template.shape[:2]
+        peaks = []
+        for _ in range(candidates):
+            _, max_val, _, (x, y) = cv2.minMaxLoc(coarse)
+            if max_val < coarse_floor:
+                break
+            peaks.append((x, y))
+            # 抑制该峰值附近的区域，继续寻找下一个候选
+            coarse[max(0, y - th // 2):y + th // 2 + 1, max(0, x - tw // 2):x + tw // 2 + 1] = -1
+        
+        template_gray = template_pyramid[0]
+        full_th, full_tw = template_gray.shape[:2]
+        screen_gray = screen_pyramid[0]
+        scale = 2 ** level
+        margin = 2 * scale
+        
+        best_val, best_loc = 0.0, None
+        for x, y in peaks:
+            # 在全分辨率下只匹配候选位置附近的小窗口
+            x0 = max(0, x * scale - margin)
+            y0 = max(0, y * scale - margin)
+            x1 = min(screen_gray.shape[1], x * scale + full_tw + margin)
+            y1 = min(screen_gray.shape[0], y * scale + full_th + margin)
+            val, loc = self._match_full(screen_gray[y0:y1, x0:x1], template_gray)
+            if loc is not None and val > best_val:
+                best_val, best_loc = val, (x0 + loc[0], y0 + loc[1])
+        
+        return best_val, best_loc
+    
+    def _find_template(self, screen_pyramid, template, threshold=0.8, pyramid=True, scales=None):
+        """
+        在已构建好金字塔的屏幕灰度图中查找模板
+        
+        Args:
+            screen_pyramid (list): 屏幕灰度图金字塔，第0层为原图
+            template (dict): _get_template返回的模板信息
+            threshold (float): 匹配阈值
+            pyramid (bool): 是否使用由粗到精的金字塔匹配
+            scales (list, optional): 容忍的模板缩放比例
+        
+        Returns:
+            dict: 包含是否找到、坐标和相似度的结果
+        """
+        screen_gray = screen_pyramid[0]
+        
+        # 每个缩放比例对应的模板金字塔
+        variants = []
+        for scale in (scales or (1.0,)):
+            if scale == 1.0:
+                variants.append((1.0, template['pyramid']))
+            else:
+                scaled = cv2.resize(template['gray'], None, fx=scale, fy=scale,
+                                    interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+                variants.append((scale, build_pyramid(scaled, self.template_cache.pyramid_levels)))
+        
+        max_val, max_loc, best_scale, target_gray = 0.0, None, 1.0, template['gray']
+        
+        # 先使用金字塔匹配
+        if pyramid and len(screen_pyramid) > 1:
+            for scale, template_pyramid in variants:
+                matched = self._match_pyramid(screen_pyramid, template_pyramid, threshold)
+                if matched and matched[1] is not None and matched[0] > max_val:
+                    max_val, max_loc, best_scale, target_gray = matched[0], matched[1], scale, template_pyramid[0]
+        
+        # 金字塔匹配未达到阈值时，使用全分辨率匹配
+        if max_val < threshold:
+            for scale, template_pyramid in variants:
+                val, loc = self._match_full(screen_gray, template_pyramid[0])
+                if loc is not None and val > max_val:
+                    max_val, max_loc, best_scale, target_gray = val, loc, scale, template_pyramid[0]
+        
+        # 检查是否达到阈值
+        if max_val >= threshold:
+            # 计算目标图像的中心点坐标
+            target_height, target_width = target_gray.shape[:2]
+            top_left = max_loc
+            bottom_right = (top_left[0] + target_width, top_left[1] + target_height)
+            center_x = top_left[0] + target_width // 2
+            center_y = top_left[1] + target_height // 2
+            
+            return {
+                'found': True,
+                'top_left': top_left,
+                'bottom_right': bottom_right,
+                'center': (center_x, center_y),
+                'similarity': max_val,
+                'scale': best_scale
+            }
+        else:
+            return {
+                'found': False,
+                'similarity': max_val
+            }
+    
+    def find_image_in_screen(self, screen_image_path, target_image_path, threshold=0.8, pyramid=True, scales=None, region=None,
+                             use_location_cache=True):
         """
         在屏幕截图中查找目标图像的位置
         
         Args:
-            screen_image_path (str): 屏幕截图路径
-            target_image_path (str): 目标图像路径
+            screen_image_path (str | numpy.ndarray): 屏幕截图路径或屏幕图像数组
+            target_image_path (str | numpy.ndarray): 目标图像路径或图像数组
             threshold (float): 匹配阈值，范围0-1，默认0.8
+            pyramid (bool): 是否使用由粗到精的金字塔匹配，默认True；未达到阈值时会回退到全分辨率匹配，不影响准确率
+            scales (list, optional): 容忍的模板缩放比例，如(0.9, 1.0, 1.1)，用于设备UI缩放与模板不一致的情况
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+            use_location_cache (bool): 是否先在上次找到该模板的位置附近查找，未找到时再查找整个屏幕（或区域）
         
         Returns:
             dict: 包含是否找到、坐标和相似度的结果
         """
+        if use_location_cache and self.location_cache and isinstance(target_image_path, str):
+            return self._find_with_location_cache(
+                screen_image_path, os.path.abspath(target_image_path), region,
+                lambda screen, search_region, fast: self.find_image_in_screen(
+                    screen, target_image_path, threshold, pyramid and not fast, scales, search_region,
+                    use_location_cache=False),
+                lambda result: result['top_left'] + result['bottom_right'])
+        
         try:
-            # 读取图像 - 优先使用PIL来处理中文路径
-            try:
-                # 尝试使用PIL读取图像，然后转换为OpenCV格式
-                screen_pil = Image.open(screen_image_path)
-                screen_img = cv2.cvtColor(np.array(screen_pil), cv2.COLOR_RGB2BGR)
-                
-                target_pil = Image.open(target_image_path)
-                target_img = cv2.cvtColor(np.array(target_pil), cv2.COLOR_RGB2BGR)
-            except Exception as e:
-                self.logger.warning(f"使用PIL读取图像失败，尝试使用OpenCV: {e}")
-                # 如果PIL读取失败，尝试使用OpenCV
-                screen_img = cv2.imread(screen_image_path)
-                target_img = cv2.imread(target_image_path)
-            
-            if screen_img is None or target_img is None:
-                raise Exception(f"无法读取图像: {screen_image_path if screen_img is None else target_image_path}")
-            
-            # 转换为灰度图以提高匹配速度
-            screen_gray = cv2.cvtColor(screen_img, cv2.COLOR_BGR2GRAY)
-            target_gray = cv2.cvtColor(target_img, cv2.COLOR_BGR2GRAY)
-            
-            # 使用模板匹配
-            result = cv2.matchTemplate(screen_gray, target_gray, cv2.TM_CCOEFF_NORMED)
-            
-            # 获取最大匹配值和位置
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-            
-            # 检查是否达到阈值
-            if max_val >= threshold:
-                # 计算目标图像的中心点坐标
-                target_height, target_width = target_gray.shape[:2]
-                top_left = max_loc
-                bottom_right = (top_left[0] + target_width, top_left[1] + target_height)
-                center_x = top_left[0] + target_width // 2
-                center_y = top_left[1] + target_height // 2
-                
-                return {
-                    'found': True,
-                    'top_left': top_left,
-                    'bottom_right': bottom_right,
-                    'center': (center_x, center_y),
-                    'similarity': max_val
-                }
-            else:
-                return {
-                    'found': False,
-                    'similarity': max_val
-                }
+            # 读取图像并转换为灰度图以提高匹配速度，模板通过缓存读取
+            screen, offset = self._crop(screen_image_path, region)
+            screen_gray = self._to_gray(screen)
+            template = self._get_template(target_image_path)
+            
+            if screen_gray is None or template is None:
+                raise Exception(f"无法读取图像: {screen_image_path if screen_gray is None else target_image_path}")
+            
+            screen_pyramid = build_pyramid(screen_gray, self.template_cache.pyramid_levels) if pyramid else [screen_gray]
+            return self._offset_match(self._find_template(screen_pyramid, template, threshold, pyramid, scales), offset)
                 
         except Exception as e:
             logger.error(f"在屏幕中查找图像失败: {e}")
             raise
     
-    def ocr_image(self, image_path, lang='chi_sim+eng', config='--oem 3 --psm 6'):
+    def find_images_in_screen(self, screen_image_path, target_image_paths, threshold=0.8, pyramid=True, scales=None, region=None):
+        """
+        在同一帧屏幕图像中批量查找多个目标图像
+        
+        屏幕的灰度转换和金字塔只计算一次，各模板的匹配在线程池中并行执行（OpenCV匹配时会释放GIL）
+        
+        Args:
+            screen_image_path (str | numpy.ndarray): 屏幕截图路径或屏幕图像数组
+            target_image_paths (list): 目标图像路径或图像数组列表
+            threshold (float): 匹配阈值，范围0-1，默认0.8
+            pyramid (bool): 是否使用由粗到精的金字塔匹配，默认True
+            scales (list, optional): 容忍的模板缩放比例
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+        
+        Returns:
+            list: 与target_image_paths顺序一致的结果列表，每个结果在find_image_in_screen结果基础上增加template字段
+        """
+        try:
+            screen, offset = self._crop(screen_image_path, region)
+            screen_gray = self._to_gray(screen)
+            if screen_gray is None:
+                raise Exception(f"无法读取图像: {screen_image_path}")
+            
+            screen_pyramid = build_pyramid(screen_gray, self.template_cache.pyramid_levels) if pyramid else [screen_gray]
+            
+            def match(target):
+                template = self._get_template(target)
+                if template is None:
+                    logger.error(f"无法读取图像: {target}")
+                    result = {'found': False, 'similarity': 0.0}
+                else:
+                    result = self._offset_match(
+                        self._find_template(screen_pyramid, template, threshold, pyramid, scales), offset)
+                result['template'] = target
+                return result
+            
+            return list(self._get_executor().map(match, target_image_paths))
+            
+        except Exception as e:
+            logger.error(f"在屏幕中批量查找图像失败: {e}")
+            raise
+    
+    def find_all_images_in_screen(self, screen_image_path, target_image_path, threshold=0.8, iou_threshold=0.3, max_results=100,
+                                  region=None):
+        """
+        在屏幕截图中查找目标图像的所有出现位置，用于列表、网格等重复元素的界面
+        
+        Args:
+            screen_image_path (str | numpy.ndarray): 屏幕截图路径或屏幕图像数组
+            target_image_path (str | numpy.ndarray): 目标图像路径或图像数组
+            threshold (float): 匹配阈值，范围0-1，默认0.8
+            iou_threshold (float): 非极大值抑制的重叠比例阈值，默认0.3
+            max_results (int): 最多返回的匹配数量，默认100
+            region (tuple | str, optional): 只在屏幕的该区域内查找，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+        
+        Returns:
+            dict: 包含是否找到、最高相似度和所有匹配位置(matches，按相似度从高到低排列)的结果
+        """
+        try:
+            screen, offset = self._crop(screen_image_path, region)
+            screen_gray = self._to_gray(screen)
+            template = self._get_template(target_image_path)
+            
+            if screen_gray is None or template is None:
+                raise Exception(f"无法读取图像: {screen_image_path if screen_gray is None else target_image_path}")
+            
+            template_gray = template['gray']
+            th, tw = template_gray.shape[:2]
+            if th > screen_gray.shape[0] or tw > screen_gray.shape[1]:
+                return {'found': False, 'similarity': 0.0, 'matches': []}
+            
+            response = cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+            
+            # 只保留超过阈值的局部极大值，避免同一目标周围的相邻位置都成为候选
+            local_max = cv2.dilate(response, np.ones((3, 3), np.uint8))
+            ys, xs = np.nonzero((response >= threshold) & (response >= local_max))
+            scores = response[ys, xs]
+            boxes = np.stack([xs, ys, xs + tw, ys + th], axis=1)
+            keep = non_max_suppression(boxes, scores, iou_threshold, max_results)
+            
+            matches = []
+            for i in keep:
+                x, y = int(xs[i]) + offset[0], int(ys[i]) + offset[1]
+                matches.append({
+                    'top_left': (x, y),
+                    'bottom_right': (x + tw, y + th),
+                    'center': (x + tw // 2, y + th // 2),
+                    'similarity': float(scores[i])
+                })
+            
+            return {
+                'found': bool(matches),
+                'similarity': matches[0]['similarity'] if matches else float(response.max()),
+                'matches': matches
+            }
+            
+        except Exception as e:
+            logger.error(f"在屏幕中查找所有图像失败: {e}")
+            raise
+    
+    def _get_executor(self):
+        """获取模板匹配使用的线程池，首次使用时创建"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4,
+                                                    thread_name_prefix='template-match')
+            return self._executor
+    
+    def ocr_image(self, image_path, lang=DEFAULT_OCR_LANG, config='--oem 3 --psm 6', region=None):
         """
         识别图像中的文字，增强版
         
         Args:
-            image_path (str): 图像路径
+            image_path (str | numpy.ndarray): 图像路径或图像数组
             lang (str): 语言，默认中文简体+英文
             config (str): Tesseract配置参数，默认使用OEM 3 (LSTM引擎) 和PSM 6 (假设为单个均匀块文本)
+            region (tuple | str, optional): 只识别该区域，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
         
         Returns:
             dict: 包含识别结果和置信度的字典
         """
+        self._ensure_tesseract()
+        img = self._read_image(image_path)
+        if img is None:
+            raise Exception(f"无法读取图像: {image_path}")
+        img, offset = self._crop(img, region)
+        return self._offset_ocr(self._ocr_cached(img, self.ocr_cache.image_key(img), lang, config), offset)
+    
+    def find_text_in_screen(self, screen_image_path, target_text, threshold=0.8, use_fuzzy=True, config='--oem 3 --psm 6', tiled=False,
+                            detect_regions=False, region=None, use_location_cache=True, use_ocr_cache=True):
+        """
+        识别屏幕图像中的文字并判断是否包含目标文字
+        
+        根据目标文字自动选择语言（纯英文只用eng模型），未找到时再使用中英文组合模型识别一次
+        
+        Args:
+            screen_image_path (str | numpy.ndarray): 屏幕截图路径或屏幕图像数组
+            target_text (str): 目标文字
+            threshold (float): 模糊匹配阈值，范围0-1，默认0.8
+            use_fuzzy (bool): 是否启用模糊匹配，默认True
+            config (str): Tesseract配置参数
+            tiled (bool): 是否使用分块OCR，只重新识别与上一帧相比发生变化的区域
+            detect_regions (bool): 是否先检测文字行区域，只识别这些区域（适合海报、视频较多的界面）
+            region (tuple | str, optional): 只识别该区域，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+            use_location_cache (bool): 是否先识别上次找到该文字的位置附近，未找到时再识别整个屏幕（或区域）
+            use_ocr_cache (bool): 是否使用OCR结果缓存，位置缓存的窗口识别不使用，避免大量相近的小图占满缓存
+        
+        Returns:
+            dict: 在ocr_image结果基础上增加found（是否找到）和lang（最终使用的语言）
+        """
+        if use_location_cache and self.location_cache:
+            return self._find_with_location_cache(
+                screen_image_path, f"text:{target_text}", region,
+                lambda screen, search_region, fast: self.find_text_in_screen(
+                    screen, target_text, threshold, use_fuzzy, config, tiled and not fast,
+                    detect_regions and not fast, search_region, use_location_cache=False, use_ocr_cache=not fast),
+                lambda result: self._locate_text(result['details'], target_text, threshold, use_fuzzy))
+        
+        self._ensure_tesseract()
+        img = self._read_image(screen_image_path)
+        if img is None:
+            raise Exception(f"无法读取图像: {screen_image_path}")
+        img, offset = self._crop(img, region)
+        image_key = self.ocr_cache.image_key(img) if use_ocr_cache and not tiled else None
+        
+        langs = [select_ocr_lang(target_text)]
+        if langs[0] != DEFAULT_OCR_LANG:
+            langs.append(DEFAULT_OCR_LANG)
+        
+        prepared = []
+        for lang in langs:
+            if tiled:
+                result = self.ocr_image_tiled(img, lang, config, prepared=prepared)
+            else:
+                result = self._ocr_cached(img, image_key, lang, config, prepared, detect_regions)
+            result['lang'] = lang
+            result['found'] = self.text_matches(result['text'], target_text, threshold, use_fuzzy)
+            if result['found']:
+                break
+            if lang != langs[-1]:
+                logger.info(f"使用{lang}模型未找到'{target_text}'，改用{DEFAULT_OCR_LANG}模型识别")
+        return self._offset_ocr(result, offset)
+    
+    def _find_with_location_cache(self, screen_image_path, target_key, region, search, box_of):
+        """
+        先在位置缓存记录的位置附近查找，未找到时再完整查找，找到后更新位置缓存
+        
+        Args:
+            screen_image_path (str | numpy.ndarray): 屏幕截图路径或屏幕图像数组
+            target_key (str): 目标标识
+            region (tuple | str, optional): 完整查找时的区域
+            search (callable): search(屏幕图像, 区域, 是否为窗口查找)，返回包含found的结果
+            box_of (callable): 从找到的结果中获取目标的(x0, y0, x1, y1)，无法确定时返回None
+        
+        Returns:
+            dict: 查找结果
+        """
+        screen = self._read_image(screen_image_path)
+        if screen is None:
+            raise Exception(f"无法读取图像: {screen_image_path}")
+        if region is not None:
+            target_key = f"{target_key}@{region}"
+        fingerprint = screen_fingerprint(screen)
+        
+        box = self.location_cache.get(target_key, fingerprint)
+        window = search_window(box, screen.shape) if box else None
+        if window:
+            result = search(screen, window, True)
+            self.location_cache.record(result['found'])
+            if result['found']:
+                return result
+        
+        result = search(screen, region, False)
+        if result['found']:
+            found_box = box_of(result)
+            if found_box:
+                self.location_cache.put(target_key, fingerprint, found_box)
+        return result
+    
+    def _locate_text(self, details, target_text, threshold=0.8, use_fuzzy=True):
+        """
+        在OCR详细数据中查找目标文字的区域
+        
+        Returns:
+            tuple: 目标文字的(x0, y0, x1, y1)，未找到时返回None
+        """
+        match = self.find_text_box(details, target_text, threshold, use_fuzzy)
+        return match['box'] if match else None
+    
+    def _ocr_cached(self, img, image_key, lang, config, prepared=None, detect_regions=False):
+        """
+        带结果缓存的OCR识别，画面内容、语言和配置都相同时直接返回缓存结果
+        
+        Args:
+            img (numpy.ndarray): 图像数组
+            image_key (str): 图像内容哈希，为None时不使用缓存
+            lang (str): 语言
+            config (str): Tesseract配置参数
+            prepared (list, optional): 保存预处理结果，同一图像多次识别时只预处理一次
+            detect_regions (bool): 是否只识别检测出的文字行区域
+        
+        Returns:
+            dict: 识别结果
+        """
+        key = (image_key, lang, config, detect_regions)
+        result = self.ocr_cache.get(key) if image_key is not None else None
+        if result is not None:
+            return result
+        
+        if prepared is None:
+            prepared = []
+        if not prepared:
+            prepared.append(self._prepare_ocr_image(img))
+        if detect_regions:
+            result = self._ocr_regions_prepared(img, prepared[0], lang, config)
+        else:
+            result = self._ocr_prepared(prepared[0], lang, config)
+        if image_key is not None:
+            self.ocr_cache.put(key, result)
+        return result
+    
+    def ocr_image_regions(self, image_path, lang=DEFAULT_OCR_LANG, config='--oem 3 --psm 6', region=None):
+        """
+        先检测文字行区域，再只对这些区域进行OCR识别（每个区域按单行文字识别），
+        跳过海报、视频等不含文字的大面积区域
+        
+        Args:
+            image_path (str | numpy.ndarray): 图像路径或图像数组
+            lang (str): 语言，默认中文简体+英文
+            config (str): Tesseract配置参数，其中的--psm会替换为7 (单行文字)
+            region (tuple | str, optional): 只识别该区域，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+        
+        Returns:
+            dict: 与ocr_image格式一致的结果，并增加regions（检测出的文字行区域）
+        """
+        self._ensure_tesseract()
+        img = self._read_image(image_path)
+        if img is None:
+            raise Exception(f"无法读取图像: {image_path}")
+        img, offset = self._crop(img, region)
+        return self._offset_ocr(self._ocr_regions_prepared(img, self._prepare_ocr_image(img), lang, config), offset)
+    
+    def _ocr_regions_prepared(self, img, thresh, lang, config):
+        """对预处理后的图像只识别检测出的文字行区域"""
+        regions = detect_text_regions(self._to_gray(img))
+        line_config = (re.sub(r'--psm\s+\d+', '', config).strip() + ' --psm 7').strip()
+        tasks = [(box, box) for box in regions]
+        data = None
+        if self.parallel_ocr:
+            try:
+                data = ocr_regions(thresh, tasks, lang, line_config, parallel=True)
+            except Exception as e:
+                self._parallel_ocr_failed(e)
+        if data is None:
+            data = ocr_regions(thresh, tasks, lang, line_config, parallel=False)
+        result = self._build_ocr_result(data)
+        result['regions'] = regions
+        return result
+    
+    def ocr_cache_stats(self):
+        """
+        获取OCR结果缓存的命中统计
+        
+        Returns:
+            dict: 包含命中次数(hits)、未命中次数(misses)和当前缓存数量(size)
+        """
+        return self.ocr_cache.stats()
+    
+    def ocr_image_tiled(self, image_path, lang=DEFAULT_OCR_LANG, config='--oem 3 --psm 6', grid=(4, 4),
+                        overlap=48, diff_threshold=24, prepared=None, region=None):
+        """
+        分块识别图像中的文字，只重新识别与上一帧相比像素发生变化的块，未变化的块复用上次的识别结果
+        
+        相邻块之间有重叠区域，单词按中心点所在的块归属，避免跨块单词被截断或重复。
+        同一行文字跨越多个块时会被拆分为多行
+        
+        Args:
+            image_path (str | numpy.ndarray): 图像路径或图像数组
+            lang (str): 语言，默认中文简体+英文
+            config (str): Tesseract配置参数
+            grid (tuple): 分块的(行数, 列数)
+            overlap (int): 相邻块的重叠像素，应大于最长单词宽度的一半
+            diff_threshold (int): 像素灰度变化超过该值才认为发生了变化
+            prepared (list, optional): 保存预处理结果，同一图像多次识别时只预处理一次
+            region (tuple | str, optional): 只识别该区域，(x, y, w, h)或布局文件中的区域名，返回的坐标为整图坐标
+        
+        Returns:
+            dict: 与ocr_image格式一致的结果，并增加changed_tiles（本次重新识别的块数）
+        """
+        self._ensure_tesseract()
+        img = self._read_image(image_path)
+        if img is None:
+            raise Exception(f"无法读取图像: {image_path}")
+        img, offset = self._crop(img, region)
+        
+        gray = self._to_gray(img)
+        height, width = gray.shape[:2]
+        rows, cols = grid
+        ys = [height * i // rows for i in range(rows + 1)]
+        xs = [width * i // cols for i in range(cols + 1)]
+        
+        with self._tile_lock:
+            state_key = (lang, config)
+            state = self._tile_states.get(state_key)
+            if state is None or state['gray'].shape != gray.shape or state['grid'] != grid:
+                state = {'gray': None, 'grid': grid, 'tiles': {}}
+            changed_mask = None
+            if state['gray'] is not None:
+                changed_mask = cv2.absdiff(gray, state['gray']) > diff_threshold
+            
+            if prepared is None:
+                prepared = []
+            
+            tiles = {}
+            changed = 0
+            for r in range(rows):
+                for c in range(cols):
+                    # 识别区域为块本身加上重叠部分
+                    x0, x1 = max(0, xs[c] - overlap), min(width, xs[c + 1] + overlap)
+                    y0, y1 = max(0, ys[r] - overlap), min(height, ys[r + 1] + overlap)
+                    
+                    if (r, c) in state['tiles'] and changed_mask is not None \
+                            and not changed_mask[y0:y1, x0:x1].any():
+                        tiles[(r, c)] = state['tiles'][(r, c)]
+                        continue
+                    
+                    if not prepared:
+                        prepared.append(self._prepare_ocr_image(img))
+                    data = self.ocr_engine.image_to_data(prepared[0][y0:y1, x0:x1], lang=lang, config=config)
+                    tiles[(r, c)] = region_words(data, x0, y0, (xs[c], ys[r], xs[c + 1], ys[r + 1]))
+                    changed += 1
+            
+            state['gray'] = gray
+            state['tiles'] = tiles
+            self._tile_states[state_key] = state
+        
+        details = merge_region_words([tiles[key] for key in sorted(tiles)])
+        
+        result = self._build_ocr_result(details)
+        result['changed_tiles'] = changed
+        return self._offset_ocr(result, offset)
+    
+    def text_matches(self, recognized_text, target_text, threshold=0.8, use_fuzzy=True):
+        """
+        判断识别出的文本中是否包含目标文字，精确匹配优先，其次模糊匹配
+        
+        按行匹配，与find_text_box一致，目标文字不会跨行或跨文字块匹配
+        
+        Args:
+            recognized_text (str): 识别出的文本
+            target_text (str): 目标文字
+            threshold (float): 模糊匹配阈值
+            use_fuzzy (bool): 是否启用模糊匹配
+        
+        Returns:
+            bool: 是否匹配
+        """
+        target = _normalize_text(target_text)
+        if any(target in _normalize_text(line) for line in str(recognized_text).splitlines()):
+            return True
+        if not use_fuzzy:
+            return False
+        try:
+            return self.fuzzy_text_search(recognized_text, target_text, threshold)
+        except Exception as e:
+            logger.error(f"模糊匹配时出错: {e}")
+            return False
+    
+    def _prepare_ocr_image(self, image_path):
+        """
+        OCR前的图像预处理（灰度、降噪、自适应二值化）
+        
+        Args:
+            image_path (str | numpy.ndarray): 图像路径或图像数组
+        
+        Returns:
+            numpy.ndarray: 二值化后的图像
+        """
         # 读取图像
-        img = cv2.imread(image_path)
+        img = self._read_image(image_path)
         
         if img is None:
             raise Exception(f"无法读取图像: {image_path}")
@@ -225,31 +1568,106 @@ class ImageRecognition:
         
         # 进行形态学操作，增强文字连通性
         kernel = np.ones((1, 1), np.uint8)
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-        
+        return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    
+    def _ocr_prepared(self, thresh, lang, config):
+        """对预处理后的图像进行OCR识别"""
         # 使用Tesseract进行OCR识别，添加额外配置提高准确率
         # --oem 3: 使用LSTM引擎
         # --psm 6: 假设为单个均匀块文本
         # -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789: 白名单
-        text = pytesseract.image_to_string(thresh, lang=lang, config=config)
+        # 只调用一次image_to_data，文本、单词位置和置信度都从同一次识别结果中获得
+        if self.parallel_ocr:
+            try:
+                # 分为水平条带在共享进程池中并行识别
+                data = ocr_image_parallel(thresh, lang=lang, config=config)
+                return self._build_ocr_result(data)
+            except Exception as e:
+                self._parallel_ocr_failed(e)
+        data = self.ocr_engine.image_to_data(thresh, lang=lang, config=config)
         
-        # 获取详细数据（包括置信度）
-        data = pytesseract.image_to_data(thresh, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        return self._build_ocr_result(data)
+    
+    def _parallel_ocr_failed(self, error):
+        """
+        处理并行OCR的失败：进程池无法使用时之后都改为单进程识别，
+        单个区域识别出错（如TesseractError）只有本次改为单进程识别
         
-        # 计算平均置信度
-        confidences = [int(conf) for conf in data['conf'] if conf != '-1']
+        Args:
+            error (Exception): 并行识别抛出的异常
+        """
+        if isinstance(error, BrokenProcessPool):
+            logger.warning(f"OCR进程池不可用，之后改为单进程识别: {error}")
+            self.parallel_ocr = False
+        else:
+            logger.warning(f"并行OCR失败，本次改为单进程识别: {error}")
+    
+    @staticmethod
+    def _build_ocr_result(data):
+        """
+        根据image_to_data的结果组装OCR结果
+        
+        Args:
+            data (dict): pytesseract.image_to_data返回的字典
+        
+        Returns:
+            dict: 包含识别文本、平均置信度和详细数据的字典
+        """
+        # 计算平均置信度，不同版本的conf可能为字符串、整数或浮点数，-1表示非单词层级
+        confidences = []
+        for conf, word in zip(data['conf'], data['text']):
+            try:
+                conf = float(conf)
+            except (TypeError, ValueError):
+                continue
+            if conf >= 0 and str(word).strip():
+                confidences.append(conf)
         avg_confidence = sum(confidences) / len(confidences) if confidences else 0
         
         return {
-            'text': text.strip(),
+            'text': ImageRecognition._text_from_data(data),
             'confidence': avg_confidence,
             'details': data
         }
     
+    @staticmethod
+    def _text_from_data(data):
+        """
+        按块、段落、行编号将image_to_data的单词拼接为文本，与image_to_string的输出格式一致
+        （同一行的单词以空格分隔，行之间换行，段落之间空一行）
+        
+        Args:
+            data (dict): pytesseract.image_to_data返回的字典
+        
+        Returns:
+            str: 识别出的文本
+        """
+        paragraphs = []
+        lines = {}
+        for i, word in enumerate(data['text']):
+            word = str(word).strip()
+            if not word:
+                continue
+            paragraph_key = (data['block_num'][i], data['par_num'][i])
+            line_key = paragraph_key + (data['line_num'][i],)
+            if line_key not in lines:
+                if not paragraphs or paragraphs[-1][0] != paragraph_key:
+                    paragraphs.append((paragraph_key, []))
+                lines[line_key] = []
+                paragraphs[-1][1].append(lines[line_key])
+            lines[line_key].append(word)
+        
+        return '\n\n'.join(
+            '\n'.join(' '.join(words) for words in paragraph_lines)
+            for _, paragraph_lines in paragraphs
+        )
+    
     def fuzzy_text_search(self, recognized_text, target_text, threshold=0.8):
         """
         模糊文本匹配，用于提高文字识别的容错性
         
+        逐行计算目标文字与该行中最相近子串的编辑距离，复杂度与识别文本长度成线性
+        
         Args:
             recognized_text (str): 识别出的文本
             target_text (str): 目标文本
@@ -258,40 +1676,29 @@ class ImageRecognition:
         Returns:
             bool: 是否匹配成功
         """
-        from difflib import SequenceMatcher
-        
-        # 转为小写进行比较
-        recognized_text = recognized_text.lower()
-        target_text = target_text.lower()
-        
-        # 精确匹配优先
-        if target_text in recognized_text:
-            return True
-        
-        # 计算相似度
-        similarity = SequenceMatcher(None, recognized_text, target_text).ratio()
-        if similarity >= threshold:
-            return True
-        
-        # 检查是否包含关键词
-        target_words = target_text.split()
-        matched_words = 0
-        for word in target_words:
-            if word in recognized_text:
-                matched_words += 1
+        return any(text_similarity(line, target_text) >= threshold for line in str(recognized_text).splitlines())
+    
+    def find_text_box(self, details, target_text, threshold=0.8, use_fuzzy=True):
+        """
+        在OCR详细数据中查找与目标文字最匹配的文字区域
         
-        # 如果匹配的关键词超过一半，也认为匹配成功
-        if matched_words >= len(target_words) * 0.5:
-            return True
+        Args:
+            details (dict): ocr_image结果中的details
+            target_text (str): 目标文字
+            threshold (float): 模糊匹配阈值，范围0-1，默认0.8
+            use_fuzzy (bool): 是否启用模糊匹配，不启用时要求完全匹配
         
-        return False
+        Returns:
+            dict: 包含匹配文本、相似度、区域(box)和中心坐标(center)，未找到时返回None
+        """
+        return best_text_match(details, target_text, threshold if use_fuzzy else 1.0)
     
     def preprocess_image(self, image_path, output_path=None):
         """
         预处理图像以提高识别率
         
         Args:
-            image_path (str): 输入图像路径
+            image_path (str | numpy.ndarray): 输入图像路径或图像数组
             output_path (str, optional): 输出图像路径，如果不指定则不保存
         
         Returns:
@@ -299,7 +1706,7 @@ class ImageRecognition:
         """
         try:
             # 读取图像
-            img = cv2.imread(image_path)
+            img = self._read_image(image_path)
             
             if img is None:
                 raise Exception(f"无法读取图像: {image_path}")
@@ -354,12 +1761,33 @@ class ImageRecognition:
         except Exception as e:
             logger.error(f"捕获设备屏幕截图失败: {e}")
             raise
+    
+    def capture_screen_image(self):
+        """
+        捕获安卓设备屏幕图像到内存，不经过文件
+        
+        Returns:
+            numpy.ndarray: BGR格式的屏幕图像
+        """
+        if not self.adb_utils:
+            logger.error("未提供ADB工具实例，无法获取设备截图")
+            raise Exception("未提供ADB工具实例，无法获取设备截图")
+        
+        image = self.adb_utils.获取屏幕图像()
+        if image is None:
+            raise Exception("使用ADB获取设备屏幕图像失败")
+        return image
+
+
+# 按(设备ID, Tesseract路径)缓存的图像识别工具实例
+_instances = {}
+_instances_lock = threading.Lock()
 
 
-# 创建全局图像识别工具实例
+# 获取全局图像识别工具实例
 def get_image_recognition(tesseract_cmd=None, adb_utils=None):
     """
-    获取图像识别工具实例
+    获取图像识别工具实例，同一设备在进程内复用同一个实例及其缓存
     
     Args:
         tesseract_cmd (str, optional): Tesseract OCR引擎路径
@@ -368,4 +1796,13 @@ def get_image_recognition(tesseract_cmd=None, adb_utils=None):
     Returns:
         ImageRecognition: 图像识别工具实例
     """
-    return ImageRecognition(tesseract_cmd, adb_utils)
\ No newline at end of file
+    device_id = getattr(adb_utils, 'device_id', None)
+    key = (device_id, tesseract_cmd)
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = ImageRecognition(tesseract_cmd, adb_utils)
+            _instances[key] = instance
+        elif adb_utils is not None and instance.adb_utils is not adb_utils:
+            instance.set_adb_utils(adb_utils)
+        return instance
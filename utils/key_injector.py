@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+低延迟按键注入工具
+直接向遥控器对应的/dev/input/eventN写入按键事件，避免`input keyevent`每次启动app_process(JVM)的开销
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 事件类型 (linux/input-event-codes.h)
+EV_SYN = 0
+EV_KEY = 1
+
+# 按键事件写入成功后输出的标记，用于判断按键是否已经注入
+KEY_DOWN_MARKER = 'KEY_INJECT_DOWN'
+KEY_UP_MARKER = 'KEY_INJECT_UP'
+
+# 方向键扫描码，用于识别遥控器输入设备
+DPAD_SCANCODES = (103, 105, 106, 108)
+
+# 未能读取设备按键布局文件时使用的默认映射 (参考Android Generic.kl)
+DEFAULT_KEY_LAYOUT = {
+    'KEYCODE_DPAD_UP': [103],
+    'KEYCODE_DPAD_DOWN': [108],
+    'KEYCODE_DPAD_LEFT': [105],
+    'KEYCODE_DPAD_RIGHT': [106],
+    'KEYCODE_DPAD_CENTER': [353, 232],
+    'KEYCODE_ENTER': [28],
+    'KEYCODE_BACK': [158],
+    'KEYCODE_HOME': [172],
+    'KEYCODE_MENU': [139],
+    'KEYCODE_VOLUME_UP': [115],
+    'KEYCODE_VOLUME_DOWN': [114],
+    'KEYCODE_POWER': [116],
+    'KEYCODE_0': [11],
+    'KEYCODE_1': [2],
+    'KEYCODE_2': [3],
+    'KEYCODE_3': [4],
+    'KEYCODE_4': [5],
+    'KEYCODE_5': [6],
+    'KEYCODE_6': [7],
+    'KEYCODE_7': [8],
+    'KEYCODE_8': [9],
+    'KEYCODE_9': [10],
+    'KEYCODE_MEDIA_PLAY_PAUSE': [164],
+    'KEYCODE_MEDIA_FAST_FORWARD': [208],
+    'KEYCODE_MEDIA_REWIND': [168],
+    'KEYCODE_MEDIA_STOP': [166],
+    'KEYCODE_CHANNEL_UP': [402],
+    'KEYCODE_CHANNEL_DOWN': [403],
+    'KEYCODE_F1': [59],
+    'KEYCODE_F2': [60],
+    'KEYCODE_F4': [62],
+}
+
+
+def parse_getevent_devices(output):
+    """
+    解析`getevent -p`的输出
+
+    Args:
+        output (str): getevent -p 的输出
+
+    Returns:
+        dict: {设备路径: {'name': 设备名, 'keys': 支持的按键扫描码集合}}
+    """
+    devices = {}
+    current = None
+    in_key_section = False
+
+    for line in output.splitlines():
+        match = re.match(r'\s*add device \d+:\s*(\S+)', line)
+        if match:
+            current = {'name': '', 'keys': set()}
+            devices[match.group(1)] = current
+            in_key_section = False
+            continue
+        if current is None:
+            continue
+
+        match = re.match(r'\s*name:\s*"(.*)"', line)
+        if match:
+            current['name'] = match.group(1)
+            continue
+
+        # 事件类型行，如 "KEY (0001): 0001  0002 ..."，后续的续行只有扫描码
+        match = re.match(r'\s*([A-Z]+)\s*\(([0-9a-fA-F]{4})\):(.*)', line)
+        if match:
+            in_key_section = int(match.group(2), 16) == EV_KEY
+            codes = match.group(3)
+        elif in_key_section and re.match(r'\s+[0-9a-fA-F]{4}(\s|$)', line):
+            codes = line
+        else:
+            in_key_section = False
+            continue
+
+        if in_key_section:
+            # 扫描码后可能带有 "*" 等状态标记
+            for code in re.findall(r'\b([0-9a-fA-F]{4})\b', codes):
+                current['keys'].add(int(code, 16))
+
+    return devices
+
+
+def parse_key_layout(content):
+    """
+    解析Android按键布局文件(.kl)
+
+    Args:
+        content (str): .kl文件内容
+
+    Returns:
+        dict: {'KEYCODE_XXX': [扫描码, ...]}
+    """
+    layout = {}
+    for line in content.splitlines():
+        # 只处理 "key <扫描码> <按键名> [标记]" 格式，忽略 "key usage" 和 "axis" 等条目
+        match = re.match(r'\s*key\s+(\d+)\s+([A-Z0-9_]+)', line)
+        if match:
+            layout.setdefault('KEYCODE_' + match.group(2), []).append(int(match.group(1)))
+    return layout
+
+
+class KeyInjector:
+    """通过sendevent向遥控器输入设备直接写入按键事件"""
+
+    def __init__(self, adb_utils):
+        """
+        初始化按键注入工具（首次使用时才探测输入设备）
+
+        Args:
+            adb_utils (object): ADB工具实例，用于在设备上执行shell命令
+        """
+        self.adb_utils = adb_utils
+        self.device_path = None
+        self.device_name = None
+        self.available = False
+        self._detected = False
+        self._commands = {}
+
+    def _shell(self, command):
+        """执行shell命令并返回输出，失败时返回None"""
+        return_code, stdout, stderr = self.adb_utils._run_adb_command(['shell', command])
+        if return_code != 0:
+            return None
+        return stdout
+
+    def _find_key_layout(self, device_path):
+        """从dumpsys input中查找输入设备对应的按键布局文件并解析"""
+        output = self._shell('dumpsys input')
+        if not output:
+            return None
+
+        layout_file = None
+        current_path = None
+        for line in output.splitlines():
+            line = line.strip()
+            if line.startswith('Path:'):
+                current_path = line.split(':', 1)[1].strip()
+            elif line.startswith('KeyLayoutFile:') and current_path == device_path:
+                layout_file = line.split(':', 1)[1].strip()
+                break
+
+        if not layout_file:
+            return None
+
+        content = self._shell(f'cat {layout_file}')
+        if not content:
+            return None
+        return parse_key_layout(content)
+
+    def detect(self):
+        """
+        探测遥控器输入设备并预先生成每个按键的sendevent命令，只执行一次
+
+        Returns:
+            bool: 按键注入是否可用
+        """
+        if self._detected:
+            return self.available
+        self._detected = True
+
+        try:
+            output = self._shell('getevent -p')
+            if not output:
+                logger.info("无法获取输入设备信息，按键注入不可用")
+                return False
+
+            # 只考虑支持全部方向键的设备，多个设备时优先支持按键更多的设备
+            devices = parse_getevent_devices(output)
+            candidates = [
+                path for path, info in devices.items()
+                if all(code in info['keys'] for code in DPAD_SCANCODES)
+            ]
+            if not candidates:
+                logger.info("未找到支持方向键的输入设备，按键注入不可用")
+                return False
+
+            path = max(candidates, key=lambda item: len(devices[item]['keys']))
+            supported_keys = devices[path]['keys']
+
+            # 不能只依赖返回码：部分执行方式（如ppadb的device.shell）总是返回0
+            if 'ok' not in (self._shell(f'test -w {path} && echo ok') or ''):
+                logger.info(f"输入设备 {path} 不可写，按键注入不可用")
+                return False
+
+            layout = self._find_key_layout(path) or DEFAULT_KEY_LAYOUT
+
+            # 预先生成按下、同步、抬起、同步的完整事件序列，按下和抬起写入成功后分别输出标记
+            for key_code, scancodes in layout.items():
+                scancode = next((code for code in scancodes if code in supported_keys), None)
+                if scancode is None:
+                    continue
+                self._commands[key_code] = '; '.join([
+                    f'sendevent {path} {EV_KEY} {scancode} 1 && echo {KEY_DOWN_MARKER}',
+                    f'sendevent {path} {EV_SYN} 0 0',
+                    f'sendevent {path} {EV_KEY} {scancode} 0 && echo {KEY_UP_MARKER}',
+                    f'sendevent {path} {EV_SYN} 0 0',
+                ])
+
+            self.device_path = path
+            self.device_name = devices[path]['name']
+            self.available = bool(self._commands)
+            logger.info(f"按键注入使用输入设备 {path} ({self.device_name})，支持 {len(self._commands)} 个按键")
+        except Exception as e:
+            logger.warning(f"探测按键输入设备失败: {e}")
+            self.available = False
+
+        return self.available
+
+    def command_for(self, key_code):
+        """
+        获取按键对应的sendevent命令
+
+        Args:
+            key_code (str): 按键代码，如'KEYCODE_DPAD_UP'
+
+        Returns:
+            str: shell命令，不支持该按键时返回None
+        """
+        if not self.detect():
+            return None
+        return self._commands.get(key_code)
+
+    def inject(self, key_code):
+        """
+        注入一次按键
+
+        Args:
+            key_code (str): 按键代码，如'KEYCODE_DPAD_UP'
+
+        Returns:
+            bool: 按键是否已经注入。只有按下事件没有写入时才返回False，调用方回退到input keyevent不会造成重复按键
+        """
+        command = self.command_for(key_code)
+        if not command:
+            return False
+
+        return_code, stdout, stderr = self.adb_utils._run_adb_command(['shell', command])
+        output = stdout or ''
+        if KEY_DOWN_MARKER in output and KEY_UP_MARKER in output:
+            return True
+
+        # 写入失败（如权限变化），后续按键回退到input keyevent
+        self.available = False
+        self._commands.clear()
+        if KEY_DOWN_MARKER in output:
+            # 按下事件已经写入，再回退会重复按键，本次按键视为已注入
+            logger.warning(f"按键 {key_code} 抬起事件写入失败，后续按键回退到input keyevent: {stderr or output}")
+            return True
+        logger.warning(f"按键注入失败，回退到input keyevent: {stderr or output}")
+        return False
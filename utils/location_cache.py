@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+目标位置缓存
+按(目标, 屏幕指纹)记录上一次找到目标的位置并保存到磁盘，
+下次查找时先在该位置附近的小窗口内查找，未找到时再查找整个屏幕
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 默认的缓存文件路径，可通过UIA_LOCATION_CACHE环境变量指定
+DEFAULT_CACHE_PATH = os.path.join('.uia_cache', 'locations.json')
+
+
+def screen_fingerprint(image):
+    """
+    计算屏幕的粗略指纹：分辨率加上4x4网格的平均亮度（每格量化为4级），
+    同一界面的焦点移动等小变化不会改变指纹
+
+    Args:
+        image (numpy.ndarray): 屏幕图像（BGR或灰度）
+
+    Returns:
+        str: 屏幕指纹
+    """
+    height, width = image.shape[:2]
+    grid = cv2.resize(image, (4, 4), interpolation=cv2.INTER_AREA)
+    if grid.ndim == 3:
+        grid = grid.mean(axis=2)
+    levels = (grid.astype(np.uint8) >> 6).flatten()
+    code = 0
+    for level in levels:
+        code = (code << 2) | int(level)
+    return f"{width}x{height}:{code:08x}"
+
+
+class LocationCache:
+    """目标位置缓存，保存在JSON文件中，多个设备和测试会话共享（修改在flush或进程退出时统一写入磁盘）"""
+
+    def __init__(self, path=None):
+        """
+        初始化位置缓存（首次使用时才读取缓存文件）
+
+        Args:
+            path (str, optional): 缓存文件路径，默认使用UIA_LOCATION_CACHE环境变量或.uia_cache/locations.json
+        """
+        self.path = path or os.environ.get('UIA_LOCATION_CACHE') or DEFAULT_CACHE_PATH
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """读取缓存文件，文件不存在或损坏时使用空缓存"""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取位置缓存失败，将重新建立: {e}")
+
+    def _save(self):
+        """写入缓存文件（先写临时文件再替换，避免写入中断导致文件损坏）"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(target, fingerprint):
+        return f"{target}|{fingerprint}"
+
+    def get(self, target, fingerprint):
+        """
+        获取目标上一次的位置
+
+        Args:
+            target (str): 目标标识，如模板路径或'text:文字'
+            fingerprint (str): 屏幕指纹
+
+        Returns:
+            tuple: 上一次找到目标的(x0, y0, x1, y1)，没有记录时返回None
+        """
+        with self._lock:
+            self._load()
+            box = self._entries.get(self._key(target, fingerprint))
+        return tuple(box) if box else None
+
+    def put(self, target, fingerprint, box):
+        """
+        记录目标的位置（在flush或进程退出时写入磁盘）
+
+        Args:
+            target (str): 目标标识
+            fingerprint (str): 屏幕指纹
+            box (tuple): 目标的(x0, y0, x1, y1)
+        """
+        box = [int(value) for value in box]
+        with self._lock:
+            self._load()
+            key = self._key(target, fingerprint)
+            if self._entries.get(key) == box:
+                return
+            self._entries[key] = box
+            self._dirty = True
+
+    def flush(self):
+        """将未保存的修改写入缓存文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self._save()
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"保存位置缓存失败: {e}")
+
+    def record(self, hit):
+        """
+        记录一次窗口查找的命中情况
+
+        Args:
+            hit (bool): 是否在缓存位置附近找到目标
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """
+        获取命中统计
+
+        Returns:
+            dict: 包含命中次数(hits)、未命中次数(misses)和记录数量(size)
+        """
+        with self._lock:
+            self._load()
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def clear(self):
+        """清空缓存并删除缓存文件"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            self.hits = 0
+            self.misses = 0
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def search_window(box, shape, margin=None):
+    """
+    根据上一次的位置计算查找窗口
+
+    Args:
+        box (tuple): 上一次的(x0, y0, x1, y1)
+        shape (tuple): 屏幕图像的shape
+        margin (int, optional): 窗口向外扩展的像素，默认为目标宽高中较大值的一半（至少32像素）
+
+    Returns:
+        tuple: 查找窗口(x, y, w, h)，超出屏幕范围时返回None
+    """
+    height, width = shape[:2]
+    x0, y0, x1, y1 = box
+    if margin is None:
+        margin = max(32, max(x1 - x0, y1 - y0) // 2)
+    wx0, wy0 = max(0, x0 - margin), max(0, y0 - margin)
+    wx1, wy1 = min(width, x1 + margin), min(height, y1 + margin)
+    if wx1 <= wx0 or wy1 <= wy0:
+        return None
+    return wx0, wy0, wx1 - wx0, wy1 - wy0
+
+
+# 进程内共享的位置缓存
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_location_cache():
+    """
+    获取进程内共享的位置缓存
+
+    Returns:
+        LocationCache: 位置缓存实例
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LocationCache()
+        return _cache
@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+OCR引擎封装
+优先使用tesserocr在进程内调用Tesseract C API，语言模型只加载一次并在多次识别间复用；
+未安装tesserocr时回退到pytesseract（每次识别启动一次tesseract进程）
+"""
+
+import os
+import shlex
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# image_to_data结果中的整数列（与pytesseract.Output.DICT一致）
+TSV_INT_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+                   'left', 'top', 'width', 'height')
+DATA_COLUMNS = TSV_INT_COLUMNS + ('conf', 'text')
+
+
+def parse_tesseract_config(config):
+    """
+    解析Tesseract命令行配置参数
+
+    Args:
+        config (str): 配置参数，如'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789'
+
+    Returns:
+        tuple: (oem, psm, 变量字典)，未指定的oem/psm为None
+    """
+    oem, psm, variables = None, None, {}
+    args = shlex.split(config or '')
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--oem', '--psm', '-c') and i + 1 < len(args):
+            value = args[i + 1]
+            if arg == '--oem':
+                oem = int(value)
+            elif arg == '--psm':
+                psm = int(value)
+            elif '=' in value:
+                name, val = value.split('=', 1)
+                variables[name] = val
+            i += 2
+            continue
+        i += 1
+    return oem, psm, variables
+
+
+class PytesseractEngine:
+    """通过pytesseract调用tesseract命令行进行识别"""
+
+    name = 'pytesseract'
+
+    def image_to_data(self, image, lang='chi_sim+eng', config=''):
+        """
+        识别图像并返回单词级别的详细数据
+
+        Args:
+            image (numpy.ndarray): 灰度或二值图像
+            lang (str): 语言
+            config (str): Tesseract配置参数
+
+        Returns:
+            dict: 与pytesseract.image_to_data(output_type=Output.DICT)格式一致的结果
+        """
+        return pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine:
+    """通过tesserocr在进程内调用Tesseract，按语言和配置缓存已初始化的API实例"""
+
+    name = 'tesserocr'
+
+    def __init__(self, tessdata_path=None):
+        """
+        初始化引擎（API实例在首次使用对应语言时才创建）
+
+        Args:
+            tessdata_path (str, optional): tessdata目录，默认使用TESSDATA_PREFIX环境变量或tesserocr的内置路径
+        """
+        self.tessdata_path = tessdata_path or os.environ.get('TESSDATA_PREFIX')
+        self._apis = {}
+        # 初始化失败（如缺少语言模型）的语言、OEM和变量组合
+        self._unsupported = set()
+        self._lock = threading.Lock()
+
+    def supports(self, lang='chi_sim+eng', config=''):
+        """
+        判断能否使用指定语言和配置识别，首次调用时初始化对应的API实例，初始化失败的组合不再重试
+
+        Args:
+            lang (str): 语言
+            config (str): Tesseract配置参数
+
+        Returns:
+            bool: 是否可用
+        """
+        oem, _, variables = parse_tesseract_config(config)
+        key = (lang, oem, tuple(sorted(variables.items())))
+        if key in self._unsupported:
+            return False
+        try:
+            self._get_api(lang, oem, variables)
+            return True
+        except Exception as e:
+            logger.warning(f"tesserocr无法加载语言模型{lang}，该语言改用pytesseract: {e}")
+            self._unsupported.add(key)
+            return False
+
+    def _get_api(self, lang, oem, variables):
+        """获取(或创建)指定语言、OEM和变量组合的API实例及其锁"""
+        key = (lang, oem, tuple(sorted(variables.items())))
+        with self._lock:
+            entry = self._apis.get(key)
+            if entry is None:
+                kwargs = {'lang': lang}
+                if self.tessdata_path:
+                    kwargs['path'] = self.tessdata_path
+                if oem is not None:
+                    kwargs['oem'] = oem
+                api = tesserocr.PyTessBaseAPI(**kwargs)
+                for name, value in variables.items():
+                    api.SetVariable(name, value)
+                # 单个API实例不是线程安全的，每个实例配一把锁
+                entry = (api, threading.Lock())
+                self._apis[key] = entry
+                logger.info(f"已加载Tesseract语言模型: {lang}")
+            return entry
+
+    def image_to_data(self, image, lang='chi_sim+eng', config=''):
+        """
+        识别图像并返回单词级别的详细数据
+
+        Args:
+            image (numpy.ndarray): 灰度或二值图像
+            lang (str): 语言
+            config (str): Tesseract配置参数
+
+        Returns:
+            dict: 与pytesseract.image_to_data(output_type=Output.DICT)格式一致的结果
+        """
+        oem, psm, variables = parse_tesseract_config(config)
+        api, api_lock = self._get_api(lang, oem, variables)
+
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        with api_lock:
+            # API实例在多次识别间复用，未指定psm时恢复为命令行的默认值，避免沿用上一次识别的设置
+            api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+            api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+            api.Recognize()
+            tsv = api.GetTSVText(0)
+            api.Clear()
+
+        return self._parse_tsv(tsv)
+
+    @staticmethod
+    def _parse_tsv(tsv):
+        """将GetTSVText的输出（无表头）转换为pytesseract的字典格式"""
+        data = {column: [] for column in DATA_COLUMNS}
+        for line in tsv.splitlines():
+            fields = line.split('\t')
+            if len(fields) < 11:
+                continue
+            for column, value in zip(TSV_INT_COLUMNS, fields):
+                data[column].append(int(value))
+            data['conf'].append(float(fields[10]))
+            data['text'].append(fields[11] if len(fields) > 11 else '')
+        return data
+
+    def close(self):
+        """释放所有API实例"""
+        with self._lock:
+            for api, _ in self._apis.values():
+                api.End()
+            self._apis.clear()
+
+
+class OCREngine:
+    """OCR引擎入口，优先使用进程内引擎，失败时回退到pytesseract"""
+
+    def __init__(self, use_tesserocr=True):
+        """
+        初始化OCR引擎
+
+        Args:
+            use_tesserocr (bool): 是否优先使用tesserocr，未安装时自动回退
+        """
+        self.fallback = PytesseractEngine()
+        self.primary = TesserocrEngine() if use_tesserocr and tesserocr is not None else None
+        logger.info(f"OCR引擎: {self.name}")
+
+    @property
+    def name(self):
+        """当前使用的引擎名称"""
+        return self.primary.name if self.primary else self.fallback.name
+
+    @property
+    def in_process(self):
+        """是否使用进程内引擎，此时不依赖tesseract可执行文件"""
+        return self.primary is not None
+
+    def image_to_data(self, image, lang='chi_sim+eng', config=''):
+        """
+        识别图像并返回单词级别的详细数据
+
+        Args:
+            image (numpy.ndarray): 灰度或二值图像
+            lang (str): 语言
+            config (str): Tesseract配置参数
+
+        Returns:
+            dict: 与pytesseract.image_to_data(output_type=Output.DICT)格式一致的结果
+        """
+        if self.primary and self.primary.supports(lang, config):
+            try:
+                return self.primary.image_to_data(image, lang, config)
+            except Exception as e:
+                # 单次识别失败（如图像数据异常）只有本次回退到pytesseract
+                logger.warning(f"tesserocr识别失败，本次回退到pytesseract: {e}")
+        return self.fallback.image_to_data(image, lang, config)
+
+
+# 进程内共享的OCR引擎，语言模型在所有设备间复用
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """
+    获取进程内共享的OCR引擎
+
+    Returns:
+        OCREngine: OCR引擎实例
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = OCREngine()
+        return _engine
+
+
+def region_words(data, offset_x, offset_y, core):
+    """
+    从区域的识别结果中提取中心点位于区域核心部分的单词，并将坐标转换为整图坐标
+
+    相邻区域之间有重叠时，单词只归属于中心点所在的区域，避免被截断的单词或重复的单词
+
+    Args:
+        data (dict): 区域的image_to_data结果
+        offset_x (int): 识别区域左上角x坐标
+        offset_y (int): 识别区域左上角y坐标
+        core (tuple): 区域核心部分（不含重叠）的(x0, y0, x1, y1)，整图坐标
+
+    Returns:
+        dict: 与image_to_data格式一致的单词数据
+    """
+    words = {column: [] for column in DATA_COLUMNS}
+    for i, text in enumerate(data['text']):
+        if not str(text).strip():
+            continue
+        left = data['left'][i] + offset_x
+        top = data['top'][i] + offset_y
+        center_x = left + data['width'][i] // 2
+        center_y = top + data['height'][i] // 2
+        if not (core[0] <= center_x < core[2] and core[1] <= center_y < core[3]):
+            continue
+        for column in DATA_COLUMNS:
+            words[column].append(data[column][i])
+        words['left'][-1] = left
+        words['top'][-1] = top
+    return words
+
+
+def merge_region_words(regions):
+    """
+    按顺序合并多个区域的单词数据，块编号加上区域序号偏移，使不同区域的文字不会被拼接到同一行
+
+    Args:
+        regions (list): region_words返回的单词数据列表
+
+    Returns:
+        dict: 与image_to_data格式一致的合并结果
+    """
+    merged = {column: [] for column in DATA_COLUMNS}
+    for index, words in enumerate(regions):
+        for column in DATA_COLUMNS:
+            values = words[column]
+            if column == 'block_num':
+                values = [index * 1000 + value for value in values]
+            merged[column].extend(values)
+    return merged
+
+
+# 进程内共享的OCR进程池，所有设备共用
+_pool = None
+_pool_tesseract_cmd = None
+_pool_lock = threading.Lock()
+
+
+def _init_ocr_worker(tesseract_cmd=None):
+    """
+    OCR子进程初始化：每个进程只用一个线程，避免多个进程的OpenMP线程互相争抢CPU；
+    spawn启动的子进程重新导入pytesseract，需要重新设置主进程中指定的tesseract路径
+    """
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _ocr_region(image, lang, config, offset_x, offset_y, core):
+    """在子进程中识别一个区域，子进程内的OCR引擎和语言模型在多次调用间复用"""
+    data = get_ocr_engine().image_to_data(image, lang, config)
+    return region_words(data, offset_x, offset_y, core)
+
+
+def get_ocr_pool():
+    """
+    获取进程内共享的OCR进程池，首次使用时创建
+
+    使用spawn方式启动子进程：调用方进程中已有shell会话读取、模板匹配、画面流等线程，
+    fork多线程进程可能在子进程中死锁。子进程使用创建进程池时的tesseract路径，路径改变后重新创建进程池
+
+    Returns:
+        ProcessPoolExecutor: 进程池
+    """
+    global _pool, _pool_tesseract_cmd
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    with _pool_lock:
+        if _pool is not None and _pool_tesseract_cmd != tesseract_cmd:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, initializer=_init_ocr_worker,
+                                        initargs=(tesseract_cmd,), mp_context=multiprocessing.get_context('spawn'))
+            _pool_tesseract_cmd = tesseract_cmd
+        return _pool
+
+
+def shutdown_ocr_pool():
+    """关闭共享的OCR进程池"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def ocr_image_parallel(image, lang='chi_sim+eng', config='', bands=None, overlap=48, min_band_height=120):
+    """
+    将图像分为相互重叠的水平条带，在进程池中并行识别后按整图坐标合并
+
+    Args:
+        image (numpy.ndarray): 预处理后的灰度或二值图像
+        lang (str): 语言
+        config (str): Tesseract配置参数
+        bands (int, optional): 条带数量，默认按CPU核数和图像高度决定
+        overlap (int): 相邻条带的重叠像素，应大于最高文字行高度的一半
+        min_band_height (int): 条带的最小高度
+
+    Returns:
+        dict: 与image_to_data格式一致的合并结果
+    """
+    height, width = image.shape[:2]
+    if bands is None:
+        bands = min(os.cpu_count() or 1, height // min_band_height)
+    if bands <= 1:
+        return get_ocr_engine().image_to_data(image, lang, config)
+
+    regions = []
+    for i in range(bands):
+        core_y0, core_y1 = height * i // bands, height * (i + 1) // bands
+        y0, y1 = max(0, core_y0 - overlap), min(height, core_y1 + overlap)
+        regions.append(((0, y0, width, y1), (0, core_y0, width, core_y1)))
+    return ocr_regions(image, regions, lang, config)
+
+
+def ocr_regions(image, regions, lang='chi_sim+eng', config='', parallel=True):
+    """
+    分别识别图像中的多个区域并按整图坐标合并，每个区域的文字作为独立的块
+
+    Args:
+        image (numpy.ndarray): 预处理后的灰度或二值图像
+        regions (list): 区域列表，每项为(识别区域, 核心区域)，均为整图坐标的(x0, y0, x1, y1)；
+            只保留中心点位于核心区域内的单词
+        lang (str): 语言
+        config (str): Tesseract配置参数
+        parallel (bool): 是否在共享进程池中并行识别
+
+    Returns:
+        dict: 与image_to_data格式一致的合并结果
+    """
+    tasks = [(image[y0:y1, x0:x1], lang, config, x0, y0, core) for (x0, y0, x1, y1), core in regions]
+    if parallel and len(tasks) > 1:
+        pool = get_ocr_pool()
+        futures = [pool.submit(_ocr_region, *task) for task in tasks]
+        return merge_region_words([future.result() for future in futures])
+    return merge_region_words([_ocr_region(*task) for task in tasks])
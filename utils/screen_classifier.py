@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+界面识别工具
+为每个已标注的参考界面生成紧凑的指纹（缩小的灰度图 + 感知哈希），
+对当前画面只需一次向量化的最近邻查询即可判断当前处于哪个界面
+"""
+
+import os
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+from utils.image_recognition import dhash
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class ScreenClassifier:
+    """界面分类器，参考界面库中每个标签可以有多张参考截图"""
+
+    def __init__(self, size=(32, 18), hash_size=8, hash_weight=0.5):
+        """
+        初始化界面分类器
+
+        Args:
+            size (tuple): 灰度指纹的(宽, 高)，默认与16:9屏幕比例一致
+            hash_size (int): dHash边长，哈希位数为hash_size*hash_size
+            hash_weight (float): 距离中哈希部分所占权重，其余为灰度指纹的相关性距离
+        """
+        self.size = size
+        self.hash_size = hash_size
+        self.hash_weight = hash_weight
+        self.labels = []
+        self._grays = np.empty((0, size[0] * size[1]), dtype=np.float32)
+        self._hashes = np.empty((0, hash_size * hash_size), dtype=bool)
+        self._lock = threading.Lock()
+
+    def fingerprint(self, image):
+        """
+        计算画面指纹
+
+        Args:
+            image (numpy.ndarray): BGR或灰度图像
+
+        Returns:
+            tuple: (归一化的灰度向量, dHash布尔向量)
+        """
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # 零均值、单位长度，点积即为相关系数，不受整体亮度变化影响
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.float32).flatten()
+        small -= small.mean()
+        norm = np.linalg.norm(small)
+        if norm > 0:
+            small /= norm
+
+        return small, dhash(gray, self.hash_size)
+
+    def add(self, label, image):
+        """
+        添加一张参考界面
+
+        Args:
+            label (str): 界面标签，如'Home'
+            image (numpy.ndarray): 参考界面截图
+        """
+        gray, hashed = self.fingerprint(image)
+        with self._lock:
+            self.labels.append(label)
+            self._grays = np.vstack([self._grays, gray])
+            self._hashes = np.vstack([self._hashes, hashed])
+
+    def load_directory(self, directory):
+        """
+        从目录加载参考界面：子目录名作为标签（子目录下可放多张截图），
+        直接放在目录下的图像以文件名作为标签；*.mask.png掩码文件会被忽略
+
+        Args:
+            directory (str): 参考界面目录
+
+        Returns:
+            int: 加载的参考界面数量
+        """
+        count = 0
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.lower().endswith(IMAGE_EXTENSIONS) or name.lower().endswith('.mask.png'):
+                    continue
+                path = os.path.join(root, name)
+                data = np.fromfile(path, dtype=np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE) if data.size else None
+                if image is None:
+                    logger.warning(f"无法读取参考界面: {path}")
+                    continue
+                if os.path.normpath(root) == os.path.normpath(directory):
+                    label = os.path.splitext(name)[0]
+                else:
+                    label = os.path.relpath(root, directory).replace(os.sep, '/')
+                self.add(label, image)
+                count += 1
+        logger.info(f"已加载 {count} 张参考界面: {directory}")
+        return count
+
+    def classify(self, image, max_distance=0.25, top_k=3):
+        """
+        判断画面属于哪个参考界面
+
+        Args:
+            image (numpy.ndarray): 当前画面
+            max_distance (float): 最大距离，超过时认为不属于任何参考界面
+            top_k (int): 返回的候选数量
+
+        Returns:
+            dict: 包含标签(label，未匹配时为None)、距离(distance，参考界面库为空时为None)和按距离排序的候选列表(candidates)
+        """
+        with self._lock:
+            labels, grays, hashes = self.labels, self._grays, self._hashes
+        if not labels:
+            logger.warning("参考界面库为空，无法识别当前界面")
+            return {'label': None, 'distance': None, 'candidates': []}
+
+        gray, hashed = self.fingerprint(image)
+        # 一次矩阵运算得到与所有参考界面的距离
+        correlation_distance = (1 - grays @ gray) / 2
+        hash_distance = np.count_nonzero(hashes != hashed, axis=1) / hashed.size
+        distances = (1 - self.hash_weight) * correlation_distance + self.hash_weight * hash_distance
+
+        # 同一标签只保留距离最近的参考截图
+        candidates = []
+        for index in np.argsort(distances):
+            label = labels[index]
+            if any(candidate['label'] == label for candidate in candidates):
+                continue
+            candidates.append({'label': label, 'distance': float(distances[index])})
+            if len(candidates) >= top_k:
+                break
+
+        best = candidates[0]
+        return {
+            'label': best['label'] if best['distance'] <= max_distance else None,
+            'distance': best['distance'],
+            'candidates': candidates
+        }
+
+    def __len__(self):
+        return len(self.labels)
+
+
+# 按目录缓存的界面分类器，所有设备共享
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_screen_classifier(directory):
+    """
+    获取加载了指定参考界面目录的分类器，同一目录只加载一次；
+    目录不存在或没有参考界面时不缓存，之后添加的参考截图在下次调用时加载
+
+    Args:
+        directory (str): 参考界面目录
+
+    Returns:
+        ScreenClassifier: 界面分类器
+    """
+    key = os.path.abspath(directory)
+    with _classifiers_lock:
+        classifier = _classifiers.get(key)
+        if classifier is None:
+            classifier = ScreenClassifier()
+            if classifier.load_directory(key):
+                _classifiers[key] = classifier
+        return classifier
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+常驻ADB shell会话
+每台设备保持一条长连接的交互式shell，命令通过结束标记切分输出和返回码，
+避免每条命令都重新建立ADB连接
+"""
+
+import atexit
+import logging
+import shlex
+import subprocess
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ShellSession:
+    """单设备常驻shell会话，多个调用方共享时按顺序执行命令"""
+
+    def __init__(self, device=None, device_id=None, use_command_line=False, default_timeout=30):
+        """
+        初始化shell会话（不会立即连接，首次执行命令时才建立连接）
+
+        Args:
+            device (object, optional): ppadb设备对象，为None时使用命令行方式
+            device_id (str, optional): 设备ID，命令行方式下用于指定设备
+            use_command_line (bool): 是否使用adb命令行建立会话
+            default_timeout (float): 单条命令默认超时时间(秒)
+        """
+        self.device = device
+        self.device_id = device_id
+        self.use_command_line = use_command_line
+        self.default_timeout = default_timeout
+
+        self._conn = None
+        self._process = None
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        # 保证同一时间只有一条命令在会话上执行
+        self._lock = threading.Lock()
+        self._alive = False
+        self._generation = 0
+        self._token = uuid.uuid4().hex[:8]
+        self._seq = 0
+
+    @property
+    def is_alive(self):
+        """会话连接是否可用"""
+        return self._alive
+
+    def open(self):
+        """建立shell长连接，已有连接会先关闭"""
+        self.close()
+
+        if not self.use_command_line and self.device:
+            # 带命令的shell服务不分配PTY，输出不会被回显和转换换行
+            conn = self.device.create_connection()
+            conn.send('shell:sh')
+            self._conn = conn
+            read_chunk = lambda: conn.read(4096)
+        else:
+            adb_cmd = ['adb']
+            if self.device_id:
+                adb_cmd.extend(['-s', self.device_id])
+            adb_cmd.extend(['shell', 'sh'])
+            self._process = subprocess.Popen(
+                adb_cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0
+            )
+            stdout = self._process.stdout
+            read_chunk = lambda: stdout.read(4096)
+
+        with self._cond:
+            self._generation += 1
+            self._buffer.clear()
+            self._alive = True
+            generation = self._generation
+
+        reader = threading.Thread(target=self._read_loop, args=(read_chunk, generation), daemon=True)
+        reader.start()
+        logger.info(f"设备 {self.device_id} 的常驻shell会话已建立")
+
+    def _read_loop(self, read_chunk, generation):
+        """后台读取shell输出到缓冲区"""
+        try:
+            while True:
+                chunk = read_chunk()
+                if not chunk:
+                    break
+                with self._cond:
+                    if generation != self._generation:
+                        return
+                    self._buffer.extend(chunk)
+                    self._cond.notify_all()
+        except (OSError, ValueError):
+            pass
+        with self._cond:
+            if generation == self._generation:
+                self._alive = False
+            self._cond.notify_all()
+
+    def _write(self, data):
+        """向shell写入数据"""
+        if self._conn:
+            self._conn.socket.sendall(data)
+        else:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+
+    def run(self, command, timeout=None):
+        """
+        在会话中执行shell命令
+
+        Args:
+            command (str): 要执行的shell命令
+            timeout (float, optional): 超时时间(秒)，默认使用default_timeout
+
+        Returns:
+            tuple: (返回码, 输出, 错误信息)，标准错误合并到输出中，返回码非0时同时作为错误信息返回
+        """
+        timeout = timeout or self.default_timeout
+
+        with self._lock:
+            if not self._alive:
+                self.open()
+
+            self._seq += 1
+            marker = f"__UIA_{self._token}_{self._seq}__"
+            # 命令作为引号包裹的参数交给子shell执行：命令中的引号不配对等语法错误只会使子shell返回错误，
+            # 不会让会话shell等待后续输入；stdin重定向避免命令读取到后续输入
+            script = f"sh -c {shlex.quote(command)} </dev/null 2>&1; printf '\\n{marker} %d\\n' $?\n"
+            pattern = f"\n{marker} ".encode('utf-8')
+
+            try:
+                self._write(script.encode('utf-8'))
+            except (OSError, ValueError) as e:
+                self.close()
+                raise Exception(f"向shell会话写入命令失败: {e}")
+
+            deadline = time.monotonic() + timeout
+            timed_out = False
+            with self._cond:
+                while True:
+                    index = self._buffer.find(pattern)
+                    if index >= 0:
+                        end = self._buffer.find(b'\n', index + len(pattern))
+                        if end >= 0:
+                            break
+                    if not self._alive:
+                        raise Exception("shell会话已断开")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    self._cond.wait(remaining)
+
+                if not timed_out:
+                    output = bytes(self._buffer[:index]).decode('utf-8', errors='replace')
+                    return_code = int(self._buffer[index + len(pattern):end])
+                    del self._buffer[:end + 1]
+
+            if timed_out:
+                # 输出流已无法与命令对应，关闭会话，下次执行时重新建立
+                self.close()
+                raise Exception(f"shell命令执行超时({timeout}秒): {command}")
+
+        return return_code, output, output if return_code != 0 else ""
+
+    def close(self):
+        """关闭shell会话"""
+        with self._cond:
+            self._alive = False
+            self._generation += 1
+            self._cond.notify_all()
+
+        if self._conn:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+        if self._process:
+            try:
+                self._process.stdin.close()
+                self._process.terminate()
+                self._process.wait(timeout=2)
+            except Exception:
+                try:
+                    self._process.kill()
+                except Exception:
+                    pass
+            self._process = None
+
+
+# 按设备ID保存的常驻shell会话
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shell_session(device=None, device_id=None, use_command_line=False):
+    """
+    获取设备的常驻shell会话，同一设备在进程内共享同一个会话
+
+    Args:
+        device (object, optional): ppadb设备对象
+        device_id (str, optional): 设备ID
+        use_command_line (bool): 是否使用adb命令行建立会话
+
+    Returns:
+        ShellSession: shell会话实例
+    """
+    with _sessions_lock:
+        session = _sessions.get(device_id)
+        if session is None or session.use_command_line != use_command_line:
+            if session:
+                session.close()
+            session = ShellSession(device, device_id, use_command_line)
+            _sessions[device_id] = session
+        return session
+
+
+def close_shell_session(device_id=None):
+    """
+    关闭设备的常驻shell会话（如adb root、重启后连接会失效）
+
+    Args:
+        device_id (str, optional): 设备ID
+    """
+    with _sessions_lock:
+        session = _sessions.pop(device_id, None)
+    if session:
+        session.close()
+
+
+@atexit.register
+def close_all_shell_sessions():
+    """关闭所有常驻shell会话"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()